@@ -1,3 +1,4 @@
+import io
 import os
 
 
@@ -44,37 +45,151 @@ class CILGenerator:
         cil_type = map_type_to_cil(const_type)
         self.constants.add((value, cil_type))
 
+    def generate(self, program):
+        for node in program.body:
+            self.statement(node)
+
+    def statement(self, node):
+        getattr(self, 'statement_' + type(node).__name__)(node)
+
+    def block(self, body):
+        for node in body:
+            self.statement(node)
+
+    def statement_Assign(self, node):
+        self.expression(node.value)
+        if node.type == 'floatnum' and node.value.type == 'intnum':
+            self.add_conversion_to_float()
+        self.store_variable(node.name)
+
+    def statement_Print(self, node):
+        for value in node.values:
+            self.expression(value)
+            self.write_output(value.type)
+
+    def statement_Scan(self, node):
+        for name, var_type in node.targets:
+            self.read_input(name, var_type)
+
+    def statement_If(self, node):
+        label_else = self.new_label()
+        self.condition(node.condition)
+        self.add_conditional_jump(label_else)
+        self.block(node.body)
+        if node.orelse is None:
+            self.add_label(label_else)
+            return
+        label_end = self.new_label()
+        self.add_unconditional_jump(label_end)
+        self.add_label(label_else)
+        self.block(node.orelse)
+        self.add_label(label_end)
+
+    def statement_While(self, node):
+        label_start = self.new_label()
+        label_end = self.new_label()
+        self.add_label(label_start)
+        self.condition(node.condition)
+        self.add_conditional_jump(label_end)
+        self.block(node.body)
+        self.add_unconditional_jump(label_start)
+        self.add_label(label_end)
+
+    def statement_For(self, node):
+        label_start = self.new_label()
+        label_end = self.new_label()
+        self.statement_Assign(node.init)
+        self.add_label(label_start)
+        self.condition(node.condition)
+        self.add_conditional_jump(label_end)
+        self.block(node.body)
+        self.statement_Assign(node.update)
+        self.add_unconditional_jump(label_start)
+        self.add_label(label_end)
+
+    def statement_Switch(self, node):
+        label_end = self.new_label()
+        for value, body in node.cases:
+            label_next = self.new_label()
+            self.operands(node.subject, value)
+            self.perform_relational_operation('==')
+            self.add_conditional_jump(label_next)
+            self.block(body)
+            self.add_unconditional_jump(label_end)
+            self.add_label(label_next)
+        if node.default is not None:
+            self.block(node.default)
+        self.add_label(label_end)
+
+    def condition(self, node):
+        # brfalse needs a boolean: other values are compared with zero
+        self.expression(node)
+        if node.type != 'bool':
+            self.add_to_cil('ldc.i4.0')
+            self.perform_relational_operation('!=')
+
+    def operands(self, left, right, widen=False):
+        # Mixed int/float operands are both loaded as float64
+        widen = widen or left.type == 'floatnum' or right.type == 'floatnum'
+        self.expression(left)
+        if widen and left.type == 'intnum':
+            self.add_conversion_to_float()
+        self.expression(right)
+        if widen and right.type == 'intnum':
+            self.add_conversion_to_float()
+
+    def expression(self, node):
+        kind = type(node).__name__
+        if kind == 'Const':
+            self.load_constant(node.value, node.type)
+        elif kind == 'Var':
+            self.load_variable(node.name)
+        elif kind == 'Unary':
+            self.expression(node.operand)
+            self.perform_unary_operation(node.op)
+        elif node.type == 'bool':
+            self.operands(node.left, node.right)
+            self.perform_relational_operation(node.op)
+        else:
+            self.operands(node.left, node.right, widen=node.op == '**')
+            self.perform_binary_operation(node.op)
+
     def save_to_file(self, filename):
         base_filename = os.path.splitext(os.path.basename(filename))[0]
         with open(filename, 'w') as f:
-            f.write(".assembly extern mscorlib\n{\n")
-            f.write("  .publickeytoken = (B7 7A 5C 56 19 34 E0 89)\n")
-            f.write("  .ver 4:0:0:0\n}\n\n")
-            f.write(f".assembly {base_filename}\n{{\n")
-            f.write("  .hash algorithm 0x00008004\n")
-            f.write("  .ver 0:0:0:0\n}\n\n")
-            f.write(f".module {base_filename}.exe\n\n")
-            f.write(".class private auto ansi beforefieldinit Program\n")
-            f.write("  extends [mscorlib]System.Object\n{\n")
-            f.write("    .method private hidebysig static void Main(string[] args) cil managed\n")
-            f.write("    {\n")
-            f.write("        .entrypoint\n")
-
-            f.write("        .locals (\n")
-            for idx, (name, cil_type) in enumerate(self.variables):
-                if idx == len(self.variables) - 1:
-                    f.write(f"           [{idx}] {cil_type} {name}\n")
-                else:
-                    f.write(f"           [{idx}] {cil_type} {name},\n")
-            f.write("        )\n\n")
-
-            for value, cil_type in self.constants:
-                f.write(f"    // {value} ({cil_type})\n")
-            for line in self.cil_code:
-                f.write(f"    {line}\n")
-            f.write("        ret\n")
-            f.write("    }\n")
-            f.write("}\n")
+            f.write(self.to_text(base_filename))
+
+    def to_text(self, base_filename):
+        f = io.StringIO()
+        f.write(".assembly extern mscorlib\n{\n")
+        f.write("  .publickeytoken = (B7 7A 5C 56 19 34 E0 89)\n")
+        f.write("  .ver 4:0:0:0\n}\n\n")
+        f.write(f".assembly {base_filename}\n{{\n")
+        f.write("  .hash algorithm 0x00008004\n")
+        f.write("  .ver 0:0:0:0\n}\n\n")
+        f.write(f".module {base_filename}.exe\n\n")
+        f.write(".class private auto ansi beforefieldinit Program\n")
+        f.write("  extends [mscorlib]System.Object\n{\n")
+        f.write("    .method private hidebysig static void Main(string[] args) cil managed\n")
+        f.write("    {\n")
+        f.write("        .entrypoint\n")
+
+        f.write("        .locals (\n")
+        for idx, (name, cil_type) in enumerate(self.variables):
+            if idx == len(self.variables) - 1:
+                f.write(f"           [{idx}] {cil_type} {name}\n")
+            else:
+                f.write(f"           [{idx}] {cil_type} {name},\n")
+        f.write("        )\n\n")
+
+        for value, cil_type in self.constants:
+            f.write(f"    // {value} ({cil_type})\n")
+        for line in self.cil_code:
+            f.write(f"    {line}\n")
+        f.write("        ret\n")
+        f.write("    }\n")
+        f.write("}\n")
+        return f.getvalue()
 
     def perform_binary_operation(self, op):
         op_map = {
@@ -157,15 +272,3 @@ class CILGenerator:
 
     def add_conversion_to_float(self):
         self.add_to_cil('conv.r8')
-
-    def get_current_position(self):
-        return len(self.cil_code)
-
-    def insert_instruction_at(self, position, instruction, *args):
-        self.cil_code.insert(position, f"    {instruction} {' '.join(map(str, args))}")
-
-    def insert_conversion_to_float_at(self, position):
-        self.insert_instruction_at(position, 'conv.r8')
-
-    def get_top(self):
-        return self.cil_code[-1]
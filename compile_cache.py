@@ -0,0 +1,129 @@
+import base64
+import hashlib
+import json
+import os
+import tempfile
+
+COMPILER_VERSION = '5'  # bump whenever the generated postfix or CIL code changes
+
+CACHE_SUFFIX = '.artifacts'
+
+
+class CompileCache:
+    """
+    On-disk cache of compilation artifacts keyed by a hash of the source, the compiler
+    version and the options that affect the output. Every entry is one JSON file holding
+    the postfix text (code, labels, variables and constants), the .psmb bytes in base64,
+    the CIL listing and the table of variables; an entry that does not decode is removed
+    and counts as a miss. A file's mtime is its last use; when the
+    directory grows past max_size bytes the least recently used entries are removed.
+    """
+
+    def __init__(self, directory='.mgo_cache', max_size=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+        self.size = None  # estimate of the directory size, scanned on the first put
+
+    @staticmethod
+    def key(chunks, name, *options):
+        # name is part of the key because the CIL listing embeds it as the assembly name
+        digest = hashlib.sha256('\0'.join(map(str, (COMPILER_VERSION, name, *options, ''))).encode())
+        for chunk in chunks:
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            artifacts = decode_artifacts(data)
+        except Exception:
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return artifacts
+
+    def put(self, key, artifacts):
+        os.makedirs(self.directory, exist_ok=True)
+        data = encode_artifacts(artifacts)
+        # Write to a temporary file and rename it, so concurrent compilers never read a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, self.path(key))
+        if self.size is None:
+            self.size = sum(size for _, size, _ in self._entries())
+        else:
+            self.size += len(data)
+        if self.size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self.size = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self.size <= self.max_size:
+                break
+            self._remove(path)
+            self.size -= size
+
+    def clear(self):
+        for path, _, _ in self._entries():
+            self._remove(path)
+        self.size = 0
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _entries(self):
+        try:
+            scan = os.scandir(self.directory)
+        except FileNotFoundError:
+            return []
+        entries = []
+        with scan:
+            for entry in scan:
+                if entry.name.endswith(CACHE_SUFFIX):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+
+def encode_artifacts(artifacts):
+    postfix, binary, cil, variables = artifacts
+    entry = {
+        'postfix': postfix,
+        'binary': base64.b64encode(binary).decode('ascii'),
+        'cil': cil,
+        'variables': [[name, *row] for name, row in variables.items()]
+    }
+    return json.dumps(entry).encode()
+
+
+def decode_artifacts(data):
+    entry = json.loads(data)
+    postfix, cil = entry['postfix'], entry['cil']
+    if not isinstance(postfix, str) or not isinstance(cil, str):
+        raise ValueError('malformed cache entry')
+    binary = base64.b64decode(entry['binary'], validate=True)
+    variables = {}
+    for name, index, var_type, status in entry['variables']:
+        variables[name] = (index, var_type, status)
+    return postfix, binary, cil, variables
@@ -0,0 +1,162 @@
+import os
+from collections import namedtuple
+from functools import partial
+
+from cil_generator import CILGenerator
+from lexer import Lexer
+from optimizer import fold_constants
+from parser import Parser
+from postfix_generator import PostfixGenerator
+from psm_io import BufferedOutput
+
+DIAG_ERRORS, DIAG_SUMMARY, DIAG_TRACE = range(3)
+
+
+class CompileResult(namedtuple('CompileResult', 'success postfix binary cil variables messages error')):
+    """
+    Artifacts of one compilation: the .postfix text, the .psmb bytes, the CIL text, the
+    parser's table of variables, the diagnostic lines (empty when they were logged
+    elsewhere) and the lexer or parser error message, if any.
+    """
+    __slots__ = ()
+
+    def save(self, base):
+        with open(f'{base}.postfix', 'w') as f:
+            f.write(self.postfix)
+        with open(f'{base}.psmb', 'wb') as f:
+            f.write(self.binary)
+        with open(f'{base}.cil', 'w') as f:
+            f.write(self.cil)
+
+
+class Compiler:
+    """
+    Compiles source text or files in memory. Every compilation uses its own Lexer, Parser
+    and generators, so one Compiler can be reused for many programs and several compilers
+    can run in threads at once.
+    stream_tokens feeds the parser from Lexer.tokens(); otherwise the full table_of_symbols
+    is built first with the given lexer_engine. With a CompileCache, successful
+    compilations are stored and unchanged sources are not lexed or parsed again, except
+    at DIAG_TRACE, which always compiles so that the trace is produced.
+    level selects the diagnostics: DIAG_ERRORS reports errors only, DIAG_SUMMARY adds the
+    lexer/parser summaries and DIAG_TRACE adds the token and grammar rule trace. log
+    receives errors and summaries; by default they are collected into
+    CompileResult.messages. The trace is buffered and written to trace (a BufferedOutput
+    writer) or, when it is None, to log line by line.
+    optimize 0 emits the program as written; 1 folds constant expressions and runs
+    the peephole pass over the postfix code.
+    """
+
+    def __init__(self, stream_tokens=True, lexer_engine=None, debug=True, log=None, cache=None, level=DIAG_ERRORS,
+                 trace=None, optimize=1):
+        self.stream_tokens = stream_tokens
+        self.lexer_engine = lexer_engine
+        self.debug = debug
+        self.log = log
+        self.cache = cache
+        self.level = level
+        self.trace = trace
+        self.optimize = optimize
+
+    def compile(self, text, name='program'):
+        if self.cache is None:
+            return self._compile(text, None, name)
+        key = self.cache.key([text.encode()], name, int(self.debug), self.optimize)
+        return self._cached(key, text, None, name)
+
+    def compile_file(self, path):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if self.cache is None:
+            return self._compile(None, path, name)
+        with open(path, 'rb') as f:
+            key = self.cache.key(iter(partial(f.read, 1 << 20), b''), name, int(self.debug), self.optimize)
+        return self._cached(key, None, path, name)
+
+    def _cached(self, key, text, path, name):
+        if self.level >= DIAG_TRACE:
+            return self._compile(text, path, name)  # a cache hit would have nothing to trace
+        artifacts = self.cache.get(key)
+        if artifacts is not None:
+            messages = []
+            if self.level >= DIAG_SUMMARY:
+                log = messages.append if self.log is None else self.log
+                log(f'Compiler: артефакти {name} взято з кешу ({key[:12]})')
+            return CompileResult(True, *artifacts, messages, None)
+        result = self._compile(text, path, name)
+        if result.success:
+            self.cache.put(key, (result.postfix, result.binary, result.cil, result.variables))
+        return result
+
+    def _compile(self, text, path, name):
+        messages = []
+        log = messages.append if self.log is None else self.log
+        trace_output = None
+        trace = None
+        if self.level >= DIAG_TRACE:
+            trace_output = BufferedOutput(log if self.trace is None else self.trace)
+            trace = trace_output.write
+            log = _after_flush(trace_output, log)
+        info = log if self.level >= DIAG_SUMMARY else None
+
+        try:
+            lexer = Lexer(text=text, fileName=path, log=log, info=info, trace=trace)
+            if self.stream_tokens:
+                lexed = True  # lexical errors surface while parsing
+                token_source = lexer.tokens()
+            else:
+                lexed = lexer.lex(self.lexer_engine) == ('Lexer', True)
+                if trace is not None:
+                    _trace_symbols(trace, lexer)
+                token_source = iter(lexer.table_of_symbols.values())
+
+            parser = Parser(token_source, log=log, info=info, trace=trace)
+            success = False
+            if lexed:
+                success = parser.run_parser()
+                if trace is not None and self.stream_tokens:
+                    # tokens() fills table_of_symbols only while tracing, as the parser reads it
+                    _trace_symbols(trace, lexer)
+                if info is not None:
+                    info(str(('num_tokens', parser.num_row - 1)))
+        finally:
+            if trace_output is not None:
+                trace_output.flush()
+
+        postfix_generator = PostfixGenerator()
+        cil_generator = CILGenerator()
+        if success:
+            if self.optimize >= 1:
+                fold_constants(parser.program)
+            postfix_generator.generate(parser.program)
+            cil_generator.generate(parser.program)
+            if self.optimize >= 1:
+                postfix_generator.optimize()
+        postfix_generator.set_variables(parser.table_of_variables)
+        cil_generator.set_variables(parser.table_of_variables)
+        return CompileResult(success, postfix_generator.to_text(), postfix_generator.to_binary(self.debug),
+                             cil_generator.to_text(name), parser.table_of_variables, messages,
+                             lexer.error or parser.error)
+
+
+def _trace_symbols(trace, lexer):
+    trace('-' * 30)
+    trace('table_of_symbols:{0}'.format(lexer.table_of_symbols))
+    trace('-' * 30)
+
+
+def _after_flush(trace_output, log):
+    # Errors and summaries must not overtake the trace lines buffered before them
+    def log_line(line):
+        trace_output.flush()
+        log(line)
+    return log_line
+
+
+def compile_source(text=None, path=None, **options):
+    """
+    Compiles source text, or the file at path, with a fresh Compiler(**options).
+    """
+    compiler = Compiler(**options)
+    if path is not None:
+        return compiler.compile_file(path)
+    return compiler.compile(text)
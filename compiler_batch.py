@@ -0,0 +1,62 @@
+import glob
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from compiler import Compiler
+
+FileResult = namedtuple('FileResult', 'path success seconds error')
+BatchSummary = namedtuple('BatchSummary', 'succeeded failed results seconds')
+
+_compiler = None
+
+
+def compile_batch(sources, max_workers=None, **options):
+    """
+    Compiles every .mgo file on a process pool and writes <name>.postfix, <name>.psmb and
+    <name>.cil next to each successfully compiled input. sources is a glob pattern or an
+    iterable of paths and patterns; options are passed to Compiler. Returns
+    BatchSummary(succeeded, failed, results, seconds) where results holds a
+    FileResult(path, success, seconds, error) per file in input order.
+    """
+    paths = _expand(sources)
+    start = time.perf_counter()
+    results = []
+    if paths:
+        with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(options,)) as pool:
+            chunksize = max(1, len(paths) // ((max_workers or os.cpu_count() or 1) * 4))
+            results = list(pool.map(_compile_file, paths, chunksize=chunksize))
+    succeeded = sum(result.success for result in results)
+    return BatchSummary(succeeded, len(results) - succeeded, results, time.perf_counter() - start)
+
+
+def _expand(sources):
+    if isinstance(sources, (str, os.PathLike)):
+        sources = [sources]
+    paths = []
+    for source in sources:
+        source = os.fspath(source)
+        paths.extend(sorted(glob.glob(source, recursive=True)) if glob.has_magic(source) else [source])
+    return paths
+
+
+def _init_worker(options):
+    global _compiler
+    _compiler = Compiler(**options)
+
+
+def _compile_file(path):
+    start = time.perf_counter()
+    try:
+        result = _compiler.compile_file(path)
+        if result.success:
+            result.save(os.path.splitext(path)[0])
+        error = result.error
+        if not result.success and error is None:
+            error = 'compilation failed'
+        success = result.success
+    except Exception as e:
+        # An unreadable file or a parser failure (RecursionError on deep nesting) fails this file only
+        success, error = False, str(e) or e.__class__.__name__
+    return FileResult(path, success, time.perf_counter() - start, error)
@@ -1,3 +1,6 @@
+import mmap
+import re
+
 # Таблиця лексем мови
 tokenTable = {'var': 'keyword', 'const': 'keyword', 'int': 'keyword', 'float': 'keyword', 'bool': 'keyword',
               'print': 'keyword', 'scan': 'keyword', 'true': 'boolval', 'false': 'boolval', 'func': 'keyword',
@@ -59,7 +62,7 @@ stf = {
     (21, 'Equal'): 23,
     (0, '!'): 24,
     (24, 'Equal'): 25,
-    (28, 'Other'): 102
+    (24, 'Other'): 102
 }
 
 initState = 0  # q0 - стартовий стан
@@ -67,176 +70,26 @@ F = {2, 6, 7, 9, 10, 11, 13, 14, 16, 17, 19, 20, 22, 23, 25, 30, 101, 102}
 
 Ferror = {101, 102}  # обробка помилок
 
-table_of_id = {}  # Таблиця ідентифікаторів
-table_of_const = {}  # Таблиць констант
-table_of_symbols = {}  # Таблиця символів програми (таблиця розбору)
-
-state = initState  # поточний стан
-
-f = open('test.mgo', 'r')
-sourceCode = f.read()
-f.close()
-
-# FSuccess - ознака успішності/неуспішності розбору
-FSuccess = ('Lexer', False)
-
-lenCode = len(sourceCode) - 1  # номер останнього символа у файлі з кодом програми
-numLine = 1  # лексичний аналіз починаємо з першого рядка
-numChar = -1  # з першого символа (в Python'і нумерація - з 0)
-char = ''  # ще не брали жодного символа
-lexeme = ''  # ще не починали розпізнавати лексеми
-
-
-def lex():
-    global state, numLine, char, lexeme, numChar, FSuccess
-    try:
-        while numChar < lenCode:
-            char = nextChar()  # прочитати наступний символ
-            classCh = classOfChar(char)  # до якого класу належить
-            state = nextState(state, classCh)  # обчислити наступний стан
-            if classCh == 'eol':
-                numLine += 1
-            if (is_final(state)):  # якщо стан заключний
-                if lexeme == '':
-                    lexeme += char
-                processing()  # виконати семантичні процедури
-            elif state == initState:
-                lexeme = ''  # якщо стан НЕ заключний, а стартовий - нова лексема
-            else:
-                lexeme += char  # якщо стан НЕ закл. і не стартовий - додати символ до лексеми
-        print('Lexer: Лексичний аналіз завершено успішно')
-        FSuccess = ('Lexer', True)
-        return FSuccess
-    except SystemExit as e:
-        # Повідомити про факт виявлення помилки
-        print('Lexer: Аварійне завершення програми з кодом {0}'.format(e))
-
-
-def processing():
-    global state, lexeme, char, numChar, table_of_symbols
-
-    if state == 2:  # keyword, id
-        # Визначаємо, чи це keyword, id чи boolval
-        if lexeme in ['true', 'false']:
-            token = 'boolval'
-        else:
-            token = getToken(state, lexeme)
-        if token == 'id':  # Якщо це id
-            index = indexIdConst(state, lexeme)
-            print('{:<10s} {:<10s} {:<5d}'.format(lexeme, token, index))
-            table_of_symbols[len(table_of_symbols) + 1] = (numLine, lexeme, token, index)
-        else:
-            print('{:<10s} {:<10s}'.format(lexeme, token))
-            table_of_symbols[len(table_of_symbols) + 1] = (numLine, lexeme, token, '')
-        lexeme = ''
-        numChar = putCharBack(numChar)
-        state = initState
-
-    elif state == 6:  # floatnum
-        index = indexIdConst(state, lexeme)
-        print('{:<10s} {:<10s} {:<5d}'.format(lexeme, 'floatnum', index))
-        table_of_symbols[len(table_of_symbols) + 1] = (numLine, lexeme, 'floatnum', index)
-        lexeme = ''
-        numChar = putCharBack(numChar)
-        state = initState
-
-    elif state == 7:  # intnum
-        index = indexIdConst(state, lexeme)
-        if isinstance(index, tuple):
-            index = index[1]
-        print('{:<10s} {:<10s} {:<5d}'.format(lexeme, 'intnum', index))
-        table_of_symbols[len(table_of_symbols) + 1] = (numLine, lexeme, 'intnum', index)
-        lexeme = ''
-        numChar = putCharBack(numChar)
-        state = initState
-
-    elif state == 9:  # short_assign_op (:=)
-        print('{:<10s} {:<10s}'.format(':=', 'short_assign_op'))
-        table_of_symbols[len(table_of_symbols) + 1] = (numLine, ':=', 'short_assign_op', '')
-        lexeme = ''
-        state = initState
-
-    elif state == 10:  # punct (:)
-        print('{:<10s} {:<10s}'.format(lexeme, 'punct'))
-        table_of_symbols[len(table_of_symbols) + 1] = (numLine, lexeme, 'punct', '')
-        lexeme = ''
-        state = initState
-
-    elif state == 11:  # add_op, mult_op, brackets_op, block_op, punct (, ;)
-        # print(lexeme)
-
-        token = getToken(state, lexeme)
-        print('{:<10s} {:<10s}'.format(lexeme, token))
-        table_of_symbols[len(table_of_symbols) + 1] = (numLine, lexeme, token, '')
-        lexeme = ''
-        state = initState
-
-    elif state == 13:  # assign_op (=)
-        print('{:<10s} {:<10s}'.format(lexeme, 'assign_op'))
-        table_of_symbols[len(table_of_symbols) + 1] = (numLine, lexeme, 'assign_op', '')
-        lexeme = ''
-        state = initState
-
-    elif state == 14:  # rel_op (==)
-        print('{:<10s} {:<10s}'.format('==', 'rel_op'))
-        table_of_symbols[len(table_of_symbols) + 1] = (numLine, '==', 'rel_op', '')
-        lexeme = ''
-        state = initState
-
-    elif state == 16:  # mult_op (*)
-        print('{:<10s} {:<10s}'.format(lexeme, 'mult_op'))
-        table_of_symbols[len(table_of_symbols) + 1] = (numLine, lexeme, 'mult_op', '')
-        lexeme = ''
-        state = initState
-
-    elif state == 17:  # power_op (**)
-        print('{:<10s} {:<10s}'.format('**', 'power_op'))
-        table_of_symbols[len(table_of_symbols) + 1] = (numLine, '**', 'power_op', '')
-        lexeme = ''
-        state = initState
-
-    elif state == 19:  # rel_op (<)
-        print('{:<10s} {:<10s}'.format(lexeme, 'rel_op'))
-        table_of_symbols[len(table_of_symbols) + 1] = (numLine, lexeme, 'rel_op', '')
-        lexeme = ''
-        state = initState
-
-    elif state == 20:  # rel_op (<=)
-        print('{:<10s} {:<10s}'.format('<=', 'rel_op'))
-        table_of_symbols[len(table_of_symbols) + 1] = (numLine, '<=', 'rel_op', '')
-        lexeme = ''
-        state = initState
-
-    elif state == 22:  # rel_op (>)
-        print('{:<10s} {:<10s}'.format(lexeme, 'rel_op'))
-        table_of_symbols[len(table_of_symbols) + 1] = (numLine, lexeme, 'rel_op', '')
-        lexeme = ''
-        state = initState
-
-    elif state == 23:  # rel_op (>=)
-        print('{:<10s} {:<10s}'.format('>=', 'rel_op'))
-        table_of_symbols[len(table_of_symbols) + 1] = (numLine, '>=', 'rel_op', '')
-        lexeme = ''
-        state = initState
-
-    elif state == 25:  # rel_op (!=)
-        print('{:<10s} {:<10s}'.format('!=', 'rel_op'))
-        table_of_symbols[len(table_of_symbols) + 1] = (numLine, '!=', 'rel_op', '')
-        lexeme = ''
-        state = initState
-    elif state in Ferror:  # (101,102):  # ERROR
-        fail()
-
-
-def fail():
-    global state, numLine, char
-    print(numLine)
-    if state == 101:
-        print('Помилка: у рядку ', numLine, ' неочікуваний символ ' + char)
-        exit(101)
-    if state == 102:
-        print('Помилка: у рядку ', numLine, ' неочікуваний символ після!')
-        exit(102)
+# Майстер-вираз для альтернативного рушія lexRegex: альтернативи перевіряються зліва направо,
+# тому багатосимвольні оператори та дійсні числа стоять перед своїми префіксами.
+# Вираз байтовий: працює прямо над mmap файлу, не-ASCII послідовність - одна помилкова лексема
+masterPattern = re.compile(rb'''
+    (?P<ws>[ \t]+)
+  | (?P<eol>[\n\r])
+  | (?P<floatnum>[0-9]+\.[0-9]+)
+  | (?P<badfloat>[0-9]+\.)
+  | (?P<intnum>[0-9]+)
+  | (?P<id>[A-Za-z][A-Za-z0-9]*)
+  | (?P<op>:=|\*\*|<=|>=|==|!=|[-+*/%(){},;:=<>])
+  | (?P<bang>!)
+  | (?P<error>[\x80-\xff]+|.)
+''', re.VERBOSE)
+
+# Класи символів у вигляді цілих чисел - індексів стовпців таблиці переходів
+charClasses = ('Letter', 'Digit', 'Dot', 'Colon', 'Equal', '<', '>', '!', '*', 'Operator', 'ws', 'eol', 'Other')
+classIndex = {name: index for index, name in enumerate(charClasses)}
+CLASS_EOL = classIndex['eol']
+CLASS_OTHER = classIndex['Other']
 
 
 def is_final(state):
@@ -247,16 +100,7 @@ def is_final(state):
 
 
 def nextState(state, classCh):
-    try:
-        return stf[(state, classCh)]
-    except KeyError:
-        return stf[(state, 'Other')]
-
-
-def nextChar():
-    global numChar
-    numChar += 1
-    return sourceCode[numChar]
+    return transitionTable[state][classIndex[classCh]]
 
 
 def putCharBack(numChar):
@@ -286,6 +130,22 @@ def classOfChar(c):
         return 'Other'
 
 
+def buildTransitionTable():
+    # Щільна таблиця δ: рядок - стан, стовпець - клас символу.
+    # Відсутні переходи ведуть у стан помилки 101 (неочікуваний символ)
+    numStates = max(max(stf.values()), max(s for s, _ in stf)) + 1
+    table = []
+    for s in range(numStates):
+        other = stf.get((s, 'Other'), 101)
+        table.append([stf.get((s, name), other) for name in charClasses])
+    return table
+
+
+transitionTable = buildTransitionTable()
+finalTable = [s in F for s in range(len(transitionTable))]
+charClassTable = [classIndex[classOfChar(chr(code))] for code in range(128)]
+
+
 def getToken(state, lexeme):
     try:
         return tokenTable[lexeme]
@@ -293,16 +153,366 @@ def getToken(state, lexeme):
         return tokStateTable[state]
 
 
-def indexIdConst(state, lexeme):
-    indx = 0
-    if state == 2:
-        indx = table_of_id.get(lexeme)
-        if indx is None:
-            indx = len(table_of_id) + 1
-            table_of_id[lexeme] = indx
-    if state in (6, 7):
-        indx = table_of_const.get(lexeme)
-        if indx is None:
-            indx = len(table_of_const) + 1
-            table_of_const[lexeme] = (tokStateTable[state], indx)
-    return indx
+sourceFile = 'test.mgo'  # файл з кодом програми за замовчуванням
+lexEngine = 'dfa'  # рушій лексичного аналізу за замовчуванням: 'dfa' або 'regex'
+
+
+class Lexer:
+    """
+    Лексичний аналізатор однієї програми. Увесь стан розбору (таблиці, поточний стан автомата,
+    позиція у тексті) зберігається в екземплярі, тому кілька аналізаторів можуть працювати
+    одночасно, зокрема в різних потоках.
+    Програма задається текстом text або шляхом до файлу fileName.
+    Діагностика: log - функція для повідомлень про помилки (print за замовчуванням),
+    info - для підсумкових повідомлень, trace - для виводу кожної лексеми;
+    None вимикає відповідні повідомлення.
+    """
+
+    def __init__(self, text=None, fileName=None, log=None, info=None, trace=None):
+        self.text = text
+        self.fileName = fileName or sourceFile
+        self.log = print if log is None else log
+        self.info = info
+        self.trace = trace
+        self.tracing = trace is not None
+
+        self.table_of_id = {}  # Таблиця ідентифікаторів
+        self.table_of_const = {}  # Таблиць констант
+        self.table_of_symbols = {}  # Таблиця символів програми (таблиця розбору)
+
+        self.state = initState  # поточний стан
+
+        self.sourceCode = None  # байти програми (mmap файлу), відображаються при виклику lex()
+        self.sourceView = None  # memoryview над sourceCode - зрізи лексем без копіювання
+
+        # FSuccess - ознака успішності/неуспішності розбору
+        self.FSuccess = ('Lexer', False)
+        self.error = None  # повідомлення про лексичну помилку
+
+        self.lenCode = -1  # номер останнього символа у файлі з кодом програми
+        self.numLine = 1  # лексичний аналіз починаємо з першого рядка
+        self.numChar = -1  # з першого символа (в Python'і нумерація - з 0)
+        self.char = ''  # ще не брали жодного символа
+        self.lexeme = ''  # ще не починали розпізнавати лексеми
+
+    def lex(self, engine=None):
+        # engine: 'dfa' - таблиця переходів, 'regex' - єдиний скомпільований регулярний вираз;
+        # без аргументу використовується прапорець lexEngine
+        self.loadSource()
+        try:
+            if (engine or lexEngine) == 'regex':
+                return self.lexRegex()
+            return self.lexDfa()
+        finally:
+            self.releaseSource()
+
+    def loadSource(self):
+        # Файл відображається в пам'ять як байти (алфавіт мови - ASCII) замість копії у str
+        if self.text is not None:
+            self.sourceCode = self.text.encode()
+        else:
+            with open(self.fileName, 'rb') as f:
+                try:
+                    self.sourceCode = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:  # порожній файл не відображається
+                    self.sourceCode = b''
+        self.sourceView = memoryview(self.sourceCode)
+        self.lenCode = len(self.sourceCode) - 1
+
+    def releaseSource(self):
+        self.sourceView.release()
+        if isinstance(self.sourceCode, mmap.mmap):
+            self.sourceCode.close()
+        self.sourceCode = self.sourceView = None
+
+    def decodeLexeme(self, start, end):
+        return str(self.sourceView[start:end], 'utf-8', 'replace')
+
+    def lexDfa(self):
+        # Лексема не накопичується посимвольно: запам'ятовується її початок lexemeStart,
+        # а текст декодується зі зрізу sourceView лише в заключному стані
+        sourceView = self.sourceView
+        lexemeStart = 0
+        try:
+            while self.numChar < self.lenCode:
+                self.numChar += 1
+                numChar = self.numChar
+                code = sourceView[numChar]  # прочитати наступний символ (байт)
+                classCh = charClassTable[code] if code < 128 else CLASS_OTHER  # до якого класу належить
+                self.state = state = transitionTable[self.state][classCh]  # обчислити наступний стан
+                if classCh == CLASS_EOL and state == initState:
+                    self.numLine += 1
+                if finalTable[state]:  # якщо стан заключний
+                    self.char = chr(code) if code < 128 else self.decodeLexeme(numChar, numChar + 4)[0]
+                    self.lexeme = self.decodeLexeme(lexemeStart, numChar) if lexemeStart < numChar else self.char
+                    self.processing()  # виконати семантичні процедури
+                    lexemeStart = self.numChar + 1
+                elif state == initState:
+                    lexemeStart = numChar + 1  # якщо стан НЕ заключний, а стартовий - нова лексема
+            if self.state != initState:  # незавершена лексема в кінці файлу - віртуальний пробіл
+                self.char = ' '
+                self.lexeme = self.decodeLexeme(lexemeStart, self.lenCode + 1)
+                self.state = transitionTable[self.state][classIndex['ws']]
+                if finalTable[self.state]:
+                    self.processing()
+            if self.info:
+                self.info('Lexer: Лексичний аналіз завершено успішно')
+            self.FSuccess = ('Lexer', True)
+            return self.FSuccess
+        except SystemExit as e:
+            # Повідомити про факт виявлення помилки
+            self.log('Lexer: Аварійне завершення програми з кодом {0}'.format(e))
+
+    def lexRegex(self):
+        try:
+            for match in masterPattern.finditer(self.sourceCode):
+                symbol = self.matchSymbol(match)
+                if symbol is not None:
+                    self.emit(symbol)
+            if self.info:
+                self.info('Lexer: Лексичний аналіз завершено успішно')
+            self.FSuccess = ('Lexer', True)
+            return self.FSuccess
+        except SystemExit as e:
+            self.log('Lexer: Аварійне завершення програми з кодом {0}'.format(e))
+
+    def tokens(self, chunkSize=65536):
+        """
+        Генератор лексем: читає файл з кодом програми порціями по chunkSize байтів і
+        повертає записи (numLine, lexeme, token, index) по одному, не заповнюючи table_of_symbols.
+        Під час трасування кожен запис проходить через emit(): друкується і потрапляє в table_of_symbols.
+        Лексема, що доходить до кінця прочитаної порції, відкладається до наступної порції,
+        бо може продовжуватися в ній.
+        При лексичній помилці викликається fail(), тобто SystemExit.
+        """
+        self.numLine = 1
+        if self.text is not None:
+            for match in masterPattern.finditer(self.text.encode()):
+                symbol = self.matchSymbol(match)
+                if symbol is not None:
+                    if self.tracing:
+                        self.emit(symbol)
+                    yield symbol
+            return
+        with open(self.fileName, 'rb') as f:
+            buffer = b''
+            final = False
+            while not final:
+                chunk = f.read(chunkSize)
+                final = chunk == b''
+                buffer += chunk
+                pos = 0
+                lenBuffer = len(buffer)
+                while pos < lenBuffer:
+                    match = masterPattern.match(buffer, pos)
+                    if match.end() == lenBuffer and not final:
+                        break
+                    pos = match.end()
+                    symbol = self.matchSymbol(match)
+                    if symbol is not None:
+                        if self.tracing:
+                            self.emit(symbol)
+                        yield symbol
+                buffer = buffer[pos:]
+
+    def matchSymbol(self, match):
+        # Перетворює збіг masterPattern на запис таблиці розбору; для пробілів і кінця рядка - None
+        kind = match.lastgroup
+        lexeme = match.group().decode('utf-8', 'replace')
+        if kind == 'ws':
+            return None
+        elif kind == 'eol':
+            self.numLine += 1
+            return None
+        elif kind == 'id':
+            if lexeme in ('true', 'false'):
+                return self.numLine, lexeme, 'boolval', ''
+            elif lexeme in tokenTable:
+                return self.numLine, lexeme, tokenTable[lexeme], ''
+            return self.numLine, lexeme, 'id', self.indexIdConst(2, lexeme)
+        elif kind in ('floatnum', 'intnum'):
+            index = self.indexIdConst(6 if kind == 'floatnum' else 7, lexeme)
+            return self.numLine, lexeme, kind, index[1] if isinstance(index, tuple) else index
+        elif kind == 'op':
+            return self.numLine, lexeme, 'short_assign_op' if lexeme == ':=' else tokenTable[lexeme], ''
+        # помилки: 'bang' - '!' без '=', 'badfloat' - крапка без дробової частини
+        self.state = 102 if kind == 'bang' else 101
+        end = match.end()
+        text = match.string
+        self.char = lexeme[0] if kind == 'error' else (chr(text[end]) if end < len(text) else ' ')
+        self.fail()
+
+    def emit(self, symbol):
+        if self.tracing:
+            _, lexeme, token, index = symbol
+            if index == '':
+                self.trace('{:<10s} {:<10s}'.format(lexeme, token))
+            else:
+                self.trace('{:<10s} {:<10s} {:<5d}'.format(lexeme, token, index))
+        self.table_of_symbols[len(self.table_of_symbols) + 1] = symbol
+
+    def processing(self):
+
+        if self.state == 2:  # keyword, id
+            # Визначаємо, чи це keyword, id чи boolval
+            if self.lexeme in ['true', 'false']:
+                token = 'boolval'
+            else:
+                token = getToken(self.state, self.lexeme)
+            if token == 'id':  # Якщо це id
+                index = self.indexIdConst(self.state, self.lexeme)
+                if self.tracing:
+                    self.trace('{:<10s} {:<10s} {:<5d}'.format(self.lexeme, token, index))
+                self.table_of_symbols[len(self.table_of_symbols) + 1] = (self.numLine, self.lexeme, token, index)
+            else:
+                if self.tracing:
+                    self.trace('{:<10s} {:<10s}'.format(self.lexeme, token))
+                self.table_of_symbols[len(self.table_of_symbols) + 1] = (self.numLine, self.lexeme, token, '')
+            self.lexeme = ''
+            self.numChar = putCharBack(self.numChar)
+            self.state = initState
+
+        elif self.state == 6:  # floatnum
+            index = self.indexIdConst(self.state, self.lexeme)
+            if isinstance(index, tuple):
+                index = index[1]
+            if self.tracing:
+                self.trace('{:<10s} {:<10s} {:<5d}'.format(self.lexeme, 'floatnum', index))
+            self.table_of_symbols[len(self.table_of_symbols) + 1] = (self.numLine, self.lexeme, 'floatnum', index)
+            self.lexeme = ''
+            self.numChar = putCharBack(self.numChar)
+            self.state = initState
+
+        elif self.state == 7:  # intnum
+            index = self.indexIdConst(self.state, self.lexeme)
+            if isinstance(index, tuple):
+                index = index[1]
+            if self.tracing:
+                self.trace('{:<10s} {:<10s} {:<5d}'.format(self.lexeme, 'intnum', index))
+            self.table_of_symbols[len(self.table_of_symbols) + 1] = (self.numLine, self.lexeme, 'intnum', index)
+            self.lexeme = ''
+            self.numChar = putCharBack(self.numChar)
+            self.state = initState
+
+        elif self.state == 9:  # short_assign_op (:=)
+            if self.tracing:
+                self.trace('{:<10s} {:<10s}'.format(':=', 'short_assign_op'))
+            self.table_of_symbols[len(self.table_of_symbols) + 1] = (self.numLine, ':=', 'short_assign_op', '')
+            self.lexeme = ''
+            self.state = initState
+
+        elif self.state == 10:  # punct (:)
+            if self.tracing:
+                self.trace('{:<10s} {:<10s}'.format(self.lexeme, 'punct'))
+            self.table_of_symbols[len(self.table_of_symbols) + 1] = (self.numLine, self.lexeme, 'punct', '')
+            self.lexeme = ''
+            self.numChar = putCharBack(self.numChar)
+            self.state = initState
+
+        elif self.state == 11:  # add_op, mult_op, brackets_op, block_op, punct (, ;)
+            # self.log(self.lexeme)
+
+            token = getToken(self.state, self.lexeme)
+            if self.tracing:
+                self.trace('{:<10s} {:<10s}'.format(self.lexeme, token))
+            self.table_of_symbols[len(self.table_of_symbols) + 1] = (self.numLine, self.lexeme, token, '')
+            self.lexeme = ''
+            self.state = initState
+
+        elif self.state == 13:  # assign_op (=)
+            if self.tracing:
+                self.trace('{:<10s} {:<10s}'.format(self.lexeme, 'assign_op'))
+            self.table_of_symbols[len(self.table_of_symbols) + 1] = (self.numLine, self.lexeme, 'assign_op', '')
+            self.lexeme = ''
+            self.numChar = putCharBack(self.numChar)
+            self.state = initState
+
+        elif self.state == 14:  # rel_op (==)
+            if self.tracing:
+                self.trace('{:<10s} {:<10s}'.format('==', 'rel_op'))
+            self.table_of_symbols[len(self.table_of_symbols) + 1] = (self.numLine, '==', 'rel_op', '')
+            self.lexeme = ''
+            self.state = initState
+
+        elif self.state == 16:  # mult_op (*)
+            if self.tracing:
+                self.trace('{:<10s} {:<10s}'.format(self.lexeme, 'mult_op'))
+            self.table_of_symbols[len(self.table_of_symbols) + 1] = (self.numLine, self.lexeme, 'mult_op', '')
+            self.lexeme = ''
+            self.numChar = putCharBack(self.numChar)
+            self.state = initState
+
+        elif self.state == 17:  # power_op (**)
+            if self.tracing:
+                self.trace('{:<10s} {:<10s}'.format('**', 'power_op'))
+            self.table_of_symbols[len(self.table_of_symbols) + 1] = (self.numLine, '**', 'power_op', '')
+            self.lexeme = ''
+            self.state = initState
+
+        elif self.state == 19:  # rel_op (<)
+            if self.tracing:
+                self.trace('{:<10s} {:<10s}'.format(self.lexeme, 'rel_op'))
+            self.table_of_symbols[len(self.table_of_symbols) + 1] = (self.numLine, self.lexeme, 'rel_op', '')
+            self.lexeme = ''
+            self.numChar = putCharBack(self.numChar)
+            self.state = initState
+
+        elif self.state == 20:  # rel_op (<=)
+            if self.tracing:
+                self.trace('{:<10s} {:<10s}'.format('<=', 'rel_op'))
+            self.table_of_symbols[len(self.table_of_symbols) + 1] = (self.numLine, '<=', 'rel_op', '')
+            self.lexeme = ''
+            self.state = initState
+
+        elif self.state == 22:  # rel_op (>)
+            if self.tracing:
+                self.trace('{:<10s} {:<10s}'.format(self.lexeme, 'rel_op'))
+            self.table_of_symbols[len(self.table_of_symbols) + 1] = (self.numLine, self.lexeme, 'rel_op', '')
+            self.lexeme = ''
+            self.numChar = putCharBack(self.numChar)
+            self.state = initState
+
+        elif self.state == 23:  # rel_op (>=)
+            if self.tracing:
+                self.trace('{:<10s} {:<10s}'.format('>=', 'rel_op'))
+            self.table_of_symbols[len(self.table_of_symbols) + 1] = (self.numLine, '>=', 'rel_op', '')
+            self.lexeme = ''
+            self.state = initState
+
+        elif self.state == 25:  # rel_op (!=)
+            if self.tracing:
+                self.trace('{:<10s} {:<10s}'.format('!=', 'rel_op'))
+            self.table_of_symbols[len(self.table_of_symbols) + 1] = (self.numLine, '!=', 'rel_op', '')
+            self.lexeme = ''
+            self.state = initState
+        elif self.state in Ferror:  # (101,102):  # ERROR
+            self.fail()
+
+    def fail(self):
+        self.log(str(self.numLine))
+        if self.state == 101:
+            self.error = f'у рядку  {self.numLine}  неочікуваний символ {self.char}'
+            self.log(f'Помилка: {self.error}')
+            exit(101)
+        if self.state == 102:
+            self.error = f'у рядку  {self.numLine}  неочікуваний символ після!'
+            self.log(f'Помилка: {self.error}')
+            exit(102)
+
+    def nextChar(self):
+        self.numChar += 1
+        return chr(self.sourceView[self.numChar])
+
+    def indexIdConst(self, state, lexeme):
+        indx = 0
+        if state == 2:
+            indx = self.table_of_id.get(lexeme)
+            if indx is None:
+                indx = len(self.table_of_id) + 1
+                self.table_of_id[lexeme] = indx
+        if state in (6, 7):
+            indx = self.table_of_const.get(lexeme)
+            if indx is None:
+                indx = len(self.table_of_const) + 1
+                self.table_of_const[lexeme] = (tokStateTable[state], indx)
+        return indx
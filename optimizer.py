@@ -0,0 +1,279 @@
+# Optimization passes run by the Compiler. fold_constants rewrites the syntax tree in place
+# before code generation, so the postfix and CIL generators both emit the folded program;
+# optimize_postfix rewrites the generated postfix code.
+import math
+import operator
+
+from parser import get_type_op
+from syntax_tree import Const
+
+ARITHMETIC_OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '%': operator.mod,
+    '**': operator.pow,
+}
+
+CONST_TYPES = {int: 'intnum', float: 'floatnum', bool: 'bool'}
+
+MAX_FOLDED_EXPONENT = 64  # larger int powers are left for the run time instead of growing at compile time
+
+RELATIONAL_OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+
+def fold_constants(program):
+    """
+    Replaces every expression made only of literals with a single Const holding the value
+    and type the PSM computes for it at run time: int '/' truncates toward zero and int '**'
+    stays an int (a float for a negative exponent). Operations the PSM rejects (mixed
+    int/float arithmetic, comparing a bool with a number) or that fail at run time
+    (division by zero, an infinite result) are left as they are, so the program still
+    reports the error when it runs. When a fold changes the type of a subexpression, the
+    types of the enclosing expressions are recomputed with get_type_op.
+    """
+    fold_block(program.body)
+    return program
+
+
+def fold_block(body):
+    for node in body:
+        fold_statement(node)
+
+
+def fold_statement(node):
+    kind = type(node).__name__
+    if kind == 'Assign':
+        node.value = fold_expression(node.value)
+    elif kind == 'Print':
+        node.values = [fold_expression(value) for value in node.values]
+    elif kind == 'If':
+        node.condition = fold_expression(node.condition)
+        fold_block(node.body)
+        if node.orelse is not None:
+            fold_block(node.orelse)
+    elif kind == 'While':
+        node.condition = fold_expression(node.condition)
+        fold_block(node.body)
+    elif kind == 'For':
+        fold_statement(node.init)
+        node.condition = fold_expression(node.condition)
+        fold_statement(node.update)
+        fold_block(node.body)
+    elif kind == 'Switch':
+        node.subject = fold_expression(node.subject)
+        node.cases = [(fold_expression(value), body) for value, body in node.cases]
+        for _, body in node.cases:
+            fold_block(body)
+        if node.default is not None:
+            fold_block(node.default)
+
+
+def fold_expression(node):
+    kind = type(node).__name__
+    if kind == 'Unary':
+        node.operand = fold_expression(node.operand)
+        operand = node.operand
+        if node.op == '+':
+            return operand
+        if type(operand) is Const and operand.type in ('intnum', 'floatnum'):
+            return make_const(-constant_value(operand))
+        node.type = operand.type
+    elif kind == 'Binary':
+        node.left = fold_expression(node.left)
+        node.right = fold_expression(node.right)
+        if type(node.left) is Const and type(node.right) is Const:
+            value = evaluate(node.op, node.left, node.right)
+            if value is not None:
+                return make_const(value)
+        node.type = get_type_op(node.left.type, node.op, node.right.type)
+    return node
+
+
+def evaluate(op, left, right):
+    # Mirrors the PSM operations; returns None when the expression must be left for the run time
+    if (left.type == 'bool') != (right.type == 'bool'):
+        return None  # the PSM rejects comparing a bool with a number
+    left, right = constant_value(left), constant_value(right)
+    if op in RELATIONAL_OPERATORS:
+        return RELATIONAL_OPERATORS[op](left, right)
+    if left.__class__ is not right.__class__ or left.__class__ is bool:
+        return None  # operand types differ
+    if op == '**' and left.__class__ is int and abs(right) > MAX_FOLDED_EXPONENT and abs(left) > 1:
+        return None
+    try:
+        if op == '/':
+            value = left / right if left.__class__ is float else int(left / right)
+        else:
+            value = ARITHMETIC_OPERATORS[op](left, right)
+    except (ArithmeticError, KeyError):
+        return None
+    if value.__class__ is complex or (value.__class__ is float and not math.isfinite(value)):
+        return None
+    return value
+
+
+def constant_value(node):
+    if node.type == 'intnum':
+        return int(node.value)
+    if node.type == 'floatnum':
+        return float(node.value)
+    return node.value.lower() == 'true'
+
+
+def make_const(value):
+    const_type = CONST_TYPES[value.__class__]
+    if const_type == 'bool':
+        return Const('true' if value else 'false', 'bool')
+    if const_type == 'floatnum':
+        return Const(float_lexeme(value), 'floatnum')
+    return Const(str(value), 'intnum')
+
+
+def float_lexeme(value):
+    # repr round-trips exactly; ilasm wants a decimal point in the mantissa
+    text = repr(value)
+    mantissa, exponent, power = text.partition('e')
+    if exponent and '.' not in mantissa:
+        text = f'{mantissa}.0e{power}'
+    return text
+
+
+# Postfix peephole pass. While it runs, a jump is one (target label, 'jump' | 'jf') item and
+# a label definition is a (name, 'label') marker that takes no place in the code.
+JUMP_TOKENS = ('jump', 'jf')
+
+
+def optimize_postfix(postfix_code, labels):
+    """
+    Peephole optimization of generated postfix code. Collapses chains of jumps to
+    unconditional jumps, turns JF on a boolean literal into a JMP or nothing, removes
+    jumps to the next instruction, code after a JMP that no label leads to and unused
+    labels, and drops the label definition pushes that the PSM never pops. Returns the new
+    (postfix_code, labels) with every label pointing at the instruction it precedes.
+    Code that does not follow the generator's label/jump layout is returned unchanged.
+    """
+    code = fuse_jumps(postfix_code, labels)
+    if code is None:
+        return postfix_code, labels
+    passes = (fold_constant_branches, thread_jumps, remove_jumps_to_next, remove_unreachable)
+    changed = True
+    while changed:
+        changed = False
+        for rewrite in passes:
+            rewritten = rewrite(code)
+            if rewritten != code:
+                code = rewritten
+                changed = True
+    return split_jumps(code)
+
+
+def fuse_jumps(postfix_code, labels):
+    defined = {}
+    for name, position in labels:
+        defined.setdefault(int(position), []).append(name)
+    code = []
+    number = 0
+    while number < len(postfix_code):
+        names = defined.get(number, ())
+        code.extend((name, 'label') for name in names)
+        lex, tok = postfix_code[number]
+        next_tok = postfix_code[number + 1][1] if number + 1 < len(postfix_code) else None
+        if tok == 'label' and next_tok in JUMP_TOKENS:
+            code.append((lex, next_tok))
+            number += 2
+            continue
+        if tok in JUMP_TOKENS or (tok == 'label' and lex not in names):
+            return None
+        if tok != 'label':
+            code.append((lex, tok))
+        number += 1
+    code.extend((name, 'label') for name in defined.get(len(postfix_code), ()))
+    if any(position > len(postfix_code) for position in defined):
+        return None
+    return code
+
+
+def split_jumps(code):
+    postfix_code = []
+    labels = []
+    for lex, tok in code:
+        if tok == 'label':
+            labels.append((lex, len(postfix_code)))
+        elif tok in JUMP_TOKENS:
+            postfix_code.append((lex, 'label'))
+            postfix_code.append(('JMP' if tok == 'jump' else 'JF', tok))
+        else:
+            postfix_code.append((lex, tok))
+    return postfix_code, labels
+
+
+def fold_constant_branches(code):
+    # true JF L never jumps and false JF L always does
+    result = []
+    for lex, tok in code:
+        if tok == 'jf' and result and result[-1][1] == 'boolval':
+            if result.pop()[0].lower() == 'true':
+                continue
+            tok = 'jump'
+        result.append((lex, tok))
+    return result
+
+
+def thread_jumps(code):
+    # A jump to a label followed by JMP L goes to L directly
+    positions = {lex: number for number, (lex, tok) in enumerate(code) if tok == 'label'}
+
+    def final_target(name):
+        seen = set()
+        while name in positions and name not in seen:
+            seen.add(name)
+            number = positions[name] + 1
+            while number < len(code) and code[number][1] == 'label':
+                number += 1
+            if number == len(code) or code[number][1] != 'jump':
+                break
+            name = code[number][0]
+        return name
+
+    return [(final_target(lex), tok) if tok in JUMP_TOKENS else (lex, tok) for lex, tok in code]
+
+
+def remove_jumps_to_next(code):
+    result = []
+    for number, (lex, tok) in enumerate(code):
+        if tok == 'jump':
+            following = number + 1
+            while following < len(code) and code[following][1] == 'label':
+                if code[following][0] == lex:
+                    break
+                following += 1
+            else:
+                result.append((lex, tok))
+            continue
+        result.append((lex, tok))
+    return result
+
+
+def remove_unreachable(code):
+    # Drops unused labels and everything after a JMP up to the next label that is jumped to
+    referenced = {lex for lex, tok in code if tok in JUMP_TOKENS}
+    result = []
+    reachable = True
+    for lex, tok in code:
+        if tok == 'label':
+            if lex in referenced:
+                reachable = True
+                result.append((lex, tok))
+        elif reachable:
+            result.append((lex, tok))
+            if tok == 'jump':
+                reachable = False
+    return result
@@ -1,751 +1,670 @@
-from cil_generator import CILGenerator
-from lexer import lex
-from lexer import table_of_symbols
-from postfix_generator import PostfixGenerator
+from collections import deque
+from syntax_tree import Assign, Binary, Const, For, If, Print, Program, Scan, Switch, Unary, Var, While
 import contextlib
 
-f_success = lex()
 
-print('-' * 30)
-print('table_of_symbols:{0}'.format(table_of_symbols))
-print('-' * 30)
-
-num_row = 1  # Номер поточної лексеми
-len_table_of_symbols = len(table_of_symbols)  # Довжина таблиці лексем
-indent_step = 2  # Крок відступу для виводу
-current_indent = 0  # Розмір поточного відступу
-postfix_generator = PostfixGenerator()
-cil_generator = CILGenerator()
-
-
-@contextlib.contextmanager
-def indent_manager():
-    global current_indent
-    current_indent += indent_step
-    try:
-        yield
-    finally:
-        current_indent -= indent_step
-
-
-def get_indent():
-    return ' ' * current_indent
-
-
-def run_parser():
-    """
-    Функція для розбору програми за правилом Program = { Declaration } MainSection.
-    :return: True якщо розбір успішний, інакше викликає SystemExit
-    """
-    try:
-        with indent_manager():
-            parse_declaration_list()
-            parse_main_section()
-        print(get_indent() + 'Parser: Синтаксичний аналіз завершився успішно')
-        return True
-    except SystemExit as e:
-        print(get_indent() + f'Parser: Аварійне завершення програми з кодом {e}')
-        return False
-
-
-def parse_declaration_list():
-    """
-    Функція для розбору списку декларацій {Declaration}
-    """
-    print(get_indent() + 'parse_declaration_list():')
-    with indent_manager():
-        while parse_declaration():
-            pass
-
-
-def parse_declaration():
-    """
-    Функція для розбору однієї декларації за правилом:
-    Declaration = VariableDecl | ShortVariableDecl | ConstDecl
-    """
-    num_line, lexeme, token = get_symbol()
-    if lexeme == 'var':
-        parse_variable_decl()
-    elif lexeme == 'const':
-        parse_const_decl()
-    elif token == 'id' and check_next_token(':='):
-        parse_short_variable_decl()
-    else:
-        return False
-    return True
-
-
-def parse_variable_decl():
-    """
-    Функція для розбору декларації змінної:
-    VariableDecl = 'var' Identifier TypeSpec [ '=' Expression ] ';'
-    """
-    print(get_indent() + 'parse_variable_decl():')
-    with indent_manager():
-        parse_token('var', 'keyword')
-
-        ident = parse_identifier()
-        proc_table_of_var(ident, parse_type_spec())
-
-        if check_current_token('='):
-            parse_token('=', 'assign_op')
-            postfix_generator.add_to_postfix(ident, 'l-val')
-            parse_expression()
-            postfix_generator.add_to_postfix('=', 'assign_op')
-            initialize_variable(ident)
-
-            cil_generator.store_variable(ident)
-        parse_token(';', 'punct')
-
-
-def parse_short_variable_decl():
-    """
-    Функція для розбору короткої декларації:
-    ShortVariableDecl = Identifier ':=' Expression ';'
-    """
-    print(get_indent() + 'parse_short_variable_decl():')
-    with indent_manager():
-        ident = parse_identifier()
-        parse_token(':=', 'short_assign_op')
-        postfix_generator.add_to_postfix(ident, 'l-val')
-        expr_type = parse_expression()
-        postfix_generator.add_to_postfix('=', 'assign_op')
-        parse_token(';', 'punct')
-        proc_table_of_var(ident, expr_type)
-        initialize_variable(ident)
-        cil_generator.store_variable(ident)
-
-
-def parse_const_decl():
-    """
-    Функція для розбору декларації константи:
-    ConstDecl = 'const' Identifier TypeSpec '=' Expression ';'
-    """
-    print(get_indent() + 'parse_const_decl():')
-    with indent_manager():
-        parse_token('const', 'keyword')
-        ident = parse_identifier()
-        proc_table_of_var(ident, parse_type_spec())
-        parse_token('=', 'assign_op')
-        postfix_generator.add_to_postfix(ident, 'l-val')
-        parse_expression()
-        initialize_variable(ident)
-        postfix_generator.add_to_postfix('=', 'assign_op')
-        parse_token(';', 'punct')
-        cil_generator.store_variable(ident)
-
-
-def parse_type_spec():
-    """
-    Функція для розбору специфікації типу:
-    TypeSpec = 'int' | 'float' | 'bool'
-    """
-    num_line, lexeme, tok = get_symbol()
-    if lexeme in ['int', 'float', 'bool']:
-        global num_row
-        num_row += 1
-        return lexeme
-    else:
-        fail_parse('невідповідний тип', (num_line, lexeme, tok))
-
-
-def parse_main_section():
-    """
-    Функція для розбору основної секції main:
-    MainSection = 'func' 'main' '(' ')' '{' Statement { Statement | Declaration } '}'
-    """
-    print(get_indent() + 'parse_main_section():')
-    with indent_manager():
-        parse_token('func', 'keyword')
-        parse_token('main', 'keyword')
-        parse_token('(', 'brackets_op')
-        parse_token(')', 'brackets_op')
-        parse_token('{', 'block_op')
-        with indent_manager():
-            while parse_statement() or parse_declaration():
+class IndentManager:
+    """
+    Збільшує відступ трасування аналізатора на час розбору одного правила.
+    """
+
+    def __init__(self, parser):
+        self.parser = parser
+
+    def __enter__(self):
+        self.parser.current_indent += self.parser.indent_step
+
+    def __exit__(self, *exc_info):
+        self.parser.current_indent -= self.parser.indent_step
+
+
+class Parser:
+    """
+    Синтаксичний аналізатор однієї програми. Будує типізоване синтаксичне дерево (syntax_tree),
+    з якого PostfixGenerator і CILGenerator генерують код окремими проходами.
+    Увесь стан розбору зберігається в екземплярі, тому кілька аналізаторів можуть
+    працювати одночасно, зокрема в різних потоках.
+    token_source - ітератор записів (numLine, lexeme, token, index): Lexer.tokens()
+    або значення table_of_symbols.
+    Діагностика: log - функція для повідомлень про помилки (print за замовчуванням),
+    info - для підсумкових повідомлень, trace - для трасування правил граматики і лексем.
+    Якщо info чи trace дорівнює None, відповідні повідомлення навіть не формуються,
+    а при вимкненому трасуванні не ведеться й облік відступів.
+    """
+
+    def __init__(self, token_source, log=None, info=None, trace=None):
+        self.token_source = token_source
+        self.log = print if log is None else log
+        self.info = info
+        self.trace = trace
+        self.tracing = trace is not None
+
+        self.num_row = 1  # Номер поточної лексеми
+        self.lookahead = deque()  # Буфер попереднього перегляду: не більше двох ще не розібраних лексем
+        self.indent_step = 2  # Крок відступу для виводу
+        self.current_indent = 0  # Розмір поточного відступу
+        # Менеджер відступу для кожного правила; без трасування - порожній контекст
+        self.indent = IndentManager(self) if self.tracing else contextlib.nullcontext()
+        self.error = None  # Повідомлення про першу синтаксичну чи семантичну помилку
+
+        # Семантичний аналіз, таблиця змінних
+        self.table_of_variables = {}
+        self.program = None  # Синтаксичне дерево після успішного розбору
+
+    def get_indent(self):
+        return ' ' * self.current_indent
+
+    def run_parser(self):
+        """
+        Функція для розбору програми за правилом Program = { Declaration } MainSection.
+        Побудоване дерево зберігається в self.program.
+        :return: True якщо розбір успішний, інакше викликає SystemExit
+        """
+        try:
+            body = []
+            with self.indent:
+                self.parse_declaration_list(body)
+                self.parse_main_section(body)
+            self.program = Program(body)
+            if self.info:
+                self.info(self.get_indent() + 'Parser: Синтаксичний аналіз завершився успішно')
+            return True
+        except SystemExit as e:
+            self.log(self.get_indent() + f'Parser: Аварійне завершення програми з кодом {e}')
+            return False
+
+    def parse_declaration_list(self, body):
+        """
+        Функція для розбору списку декларацій {Declaration}
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_declaration_list():')
+        with self.indent:
+            while self.parse_declaration(body):
                 pass
-        parse_token('}', 'block_op')
-    if num_row < len_table_of_symbols:
-        extra_token = get_symbol()
-        fail_parse('Неочікуваний токен після завершення main', extra_token)
-
 
-def parse_statement():
-    """
-    Функція для розбору інструкції (Statement).
-    Підтримує всі типи інструкцій згідно з граматикою.
-    """
-    num_line, lexeme, tok = get_symbol()
-    if tok == 'id' and check_next_token('='):
-        parse_assign()
-        return True
-    elif lexeme == 'print':
-        parse_output_stmt()
-        return True
-    elif lexeme == 'scan':
-        parse_input_stmt()
-        return True
-    elif lexeme == 'for':
-        parse_for_stmt()
-        return True
-    elif lexeme == 'while':
-        parse_while_stmt()
-        return True
-    elif lexeme == 'if':
-        parse_if_stmt()
-        return True
-    elif lexeme == 'switch':
-        parse_switch_stmt()
+    def parse_declaration(self, body):
+        """
+        Функція для розбору однієї декларації за правилом:
+        Declaration = VariableDecl | ShortVariableDecl | ConstDecl
+        Вузол присвоєння початкового значення (якщо воно є) додається до body.
+        """
+        num_line, lexeme, token = self.get_symbol()
+        if lexeme == 'var':
+            node = self.parse_variable_decl()
+        elif lexeme == 'const':
+            node = self.parse_const_decl()
+        elif token == 'id' and self.check_next_token(':='):
+            node = self.parse_short_variable_decl()
+        else:
+            return False
+        if node is not None:
+            body.append(node)
         return True
-    else:
-        return False
-
-
-def parse_assign():
-    """
-    Функція для розбору інструкції присвоювання:
-    AssignmentStmt = Identifier '=' Expression ';'
-    """
-    print(get_indent() + 'parse_assign():')
-    with indent_manager():
-        ident = parse_identifier()
-        postfix_generator.add_to_postfix(ident, 'l-val')
-        parse_token('=', 'assign_op')
-        expr_type = parse_expression()
-        postfix_generator.add_to_postfix('=', 'assign_op')
-        parse_token(';', 'punct')
-
-        initialize_variable(ident)
-        var_type = get_type_var(ident)
-        if var_type != expr_type and not (var_type == 'floatnum' and expr_type == 'intnum'):
-            fail_parse('Несумісні типи при присвоєнні', (ident, var_type, expr_type))
-
-        if var_type == 'floatnum' and expr_type == 'intnum':
-            cil_generator.add_conversion_to_float()
-
-        cil_generator.store_variable(ident)
-
-
-def parse_output_stmt():
-    """
-    Функція для розбору інструкції виведення:
-    OutputStmt = 'print' '(' ExpressionList ')' ';'
-    """
-    print(get_indent() + 'parse_output_stmt():')
-    with indent_manager():
-        parse_token('print', 'keyword')
-        parse_token('(', 'brackets_op')
-        parse_output_expression_list()
-        parse_token(')', 'brackets_op')
-        parse_token(';', 'punct')
-
-
-def parse_input_stmt():
-    """
-    Функція для розбору інструкції введення:
-    InputStmt = 'scan' '(' IdentifierList ')' ';'
-    """
-    print(get_indent() + 'parse_input_stmt():')
-    with indent_manager():
-        parse_token('scan', 'keyword')
-        parse_token('(', 'brackets_op')
-        identifiers = parse_input_identifier_list()
-        parse_token(')', 'brackets_op')
-        parse_token(';', 'punct')
-
-        for ident in identifiers:
-            initialize_variable(ident)
-            cil_generator.read_input(ident, get_type_var(ident))
-
-
-def check_current_token(expected_lexeme):
-    num_line, lexeme, tok = get_symbol()
-    return lexeme == expected_lexeme
-
 
-def check_next_token(expected_lexeme):
-    num_line, lexeme, tok = get_next_symbol()
-    return lexeme == expected_lexeme
-
-
-def parse_for_stmt():
-    """
-    Функція для розбору інструкції ітеративного циклу:
-    ForStmt = 'for' '(' Identifier ':=' ArithmExpression ';' Expression ';' Identifier '=' ArithmExpression ')' DoBlock.
-    """
-    print(get_indent() + 'parse_for_stmt():')
-    with indent_manager():
-        label_start = postfix_generator.new_label()
-        label_end = postfix_generator.new_label()
-        cil_label_start = cil_generator.new_label()
-        cil_label_end = cil_generator.new_label()
-
-        parse_token('for', 'keyword')
-        parse_token('(', 'brackets_op')
-        parse_short_variable_decl()
-
-        postfix_generator.add_label(label_start)
-        cil_generator.add_label(cil_label_start)
-        parse_expression()
-        postfix_generator.add_conditional_jump(label_end)
-        cil_generator.add_conditional_jump(cil_label_end)
-
-        parse_token(';', 'punct')
-        id = parse_identifier()
-        postfix_generator.add_to_postfix(id, 'l-val')
-        parse_token('=', 'assign_op')
-        parse_arithm_expression()
-        postfix_generator.add_to_postfix('=', 'assign_op')
-        cil_generator.store_variable(id)
-        parse_token(')', 'brackets_op')
-        parse_do_block()
-
-        postfix_generator.add_unconditional_jump(label_start)
-        cil_generator.add_unconditional_jump(cil_label_start)
-        postfix_generator.add_label(label_end)
-        cil_generator.add_label(cil_label_end)
-
-
-def parse_while_stmt():
-    """
-    Функція для розбору інструкції умовного циклу:
-    WhileStmt = 'while' Expression DoBlock
-    """
-    print(get_indent() + 'parse_while_stmt():')
-    with indent_manager():
-        label_start = postfix_generator.new_label()
-        label_end = postfix_generator.new_label()
-        cil_label_start = cil_generator.new_label()
-        cil_label_end = cil_generator.new_label()
-        postfix_generator.add_label(label_start)
-        cil_generator.add_label(cil_label_start)
-        parse_token('while', 'keyword')
-        expr_type = parse_expression()
-        if expr_type != 'bool':
-            cil_generator.add_to_cil('ldc.i4.0')
-            cil_generator.perform_relational_operation('!=')
-        postfix_generator.add_conditional_jump(label_end)
-        cil_generator.add_conditional_jump(cil_label_end)
-        parse_do_block()
-        postfix_generator.add_unconditional_jump(label_start)
-        cil_generator.add_unconditional_jump(cil_label_start)
-        postfix_generator.add_label(label_end)
-        cil_generator.add_label(cil_label_end)
-
-
-def parse_if_stmt():
-    """
-    Функція для розбору інструкції розгалуження:
-    IfStmt = 'if' Expression DoBlock [ 'else' DoBlock ]
-    """
-    print(get_indent() + 'parse_if_stmt():')
-    with indent_manager():
-        parse_token('if', 'keyword')
-        expr_type = parse_expression()
-        if expr_type != 'bool':
-            cil_generator.add_to_cil('ldc.i4.0')
-            cil_generator.perform_relational_operation('!=')
-        label_else = postfix_generator.new_label()
-        cil_label_else = cil_generator.new_label()
-        postfix_generator.add_conditional_jump(label_else)
-        cil_generator.add_conditional_jump(cil_label_else)
-        parse_do_block()
-        if check_current_token('else'):
-            label_end = postfix_generator.new_label()
-            postfix_generator.add_unconditional_jump(label_end)
-            cil_label_end = cil_generator.new_label()
-            cil_generator.add_unconditional_jump(cil_label_end)
-            postfix_generator.add_label(label_else)
-            cil_generator.add_label(cil_label_else)
-            parse_token('else', 'keyword')
-            parse_do_block()
-            postfix_generator.add_label(label_end)
-            cil_generator.add_label(cil_label_end)
+    def parse_variable_decl(self):
+        """
+        Функція для розбору декларації змінної:
+        VariableDecl = 'var' Identifier TypeSpec [ '=' Expression ] ';'
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_variable_decl():')
+        with self.indent:
+            num_line = self.get_symbol()[0]
+            self.parse_token('var', 'keyword')
+
+            ident = self.parse_identifier()
+            self.proc_table_of_var(ident, self.parse_type_spec())
+
+            node = None
+            if self.check_current_token('='):
+                self.parse_token('=', 'assign_op')
+                value = self.parse_expression()
+                self.initialize_variable(ident)
+                node = Assign(ident, self.get_type_var(ident), value, num_line)
+            self.parse_token(';', 'punct')
+            return node
+
+    def parse_short_variable_decl(self):
+        """
+        Функція для розбору короткої декларації:
+        ShortVariableDecl = Identifier ':=' Expression ';'
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_short_variable_decl():')
+        with self.indent:
+            num_line = self.get_symbol()[0]
+            ident = self.parse_identifier()
+            self.parse_token(':=', 'short_assign_op')
+            value = self.parse_expression()
+            self.parse_token(';', 'punct')
+            self.proc_table_of_var(ident, value.type)
+            self.initialize_variable(ident)
+            return Assign(ident, self.get_type_var(ident), value, num_line)
+
+    def parse_const_decl(self):
+        """
+        Функція для розбору декларації константи:
+        ConstDecl = 'const' Identifier TypeSpec '=' Expression ';'
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_const_decl():')
+        with self.indent:
+            num_line = self.get_symbol()[0]
+            self.parse_token('const', 'keyword')
+            ident = self.parse_identifier()
+            self.proc_table_of_var(ident, self.parse_type_spec())
+            self.parse_token('=', 'assign_op')
+            value = self.parse_expression()
+            self.initialize_variable(ident)
+            self.parse_token(';', 'punct')
+            return Assign(ident, self.get_type_var(ident), value, num_line)
+
+    def parse_type_spec(self):
+        """
+        Функція для розбору специфікації типу:
+        TypeSpec = 'int' | 'float' | 'bool'
+        """
+        num_line, lexeme, tok = self.get_symbol()
+        if lexeme in ['int', 'float', 'bool']:
+            self.advance()
+            return lexeme
         else:
-            postfix_generator.add_label(label_else)
-            cil_generator.add_label(cil_label_else)
-
-
-def parse_switch_stmt():
-    """
-    Функція для розбору інструкції багатонаправленого розгалуження:
-    SwitchStmt = 'switch' Expression '{' { CaseClause } [ DefaultClause ] '}'
-    """
-    print(get_indent() + 'parse_switch_stmt():')
-    with indent_manager():
-        parse_token('switch', 'keyword')
-
-        parse_expression()
-        comparison_var = postfix_generator.get_postfix_code()[-1][0]
-
-        postfix_generator.add_to_postfix(comparison_var, 'r-val')
-        parse_token('{', 'block_op')
-
-        case_labels = []
-        end_label = postfix_generator.new_label()
-        cil_end_label = cil_generator.new_label()
-        with indent_manager():
-            while check_current_token('case'):
-                case_label = postfix_generator.new_label()
-                cil_case_label = cil_generator.new_label()
-                case_labels.append((case_label, cil_case_label))
-
-                parse_case_clause(case_label, end_label, comparison_var, cil_case_label, cil_end_label)
-            if check_current_token('default'):
-                parse_default_clause()
-
-        postfix_generator.add_label(end_label)
-        cil_generator.add_label(cil_end_label)
-        parse_token('}', 'block_op')
-
-
-def parse_case_clause(case_label, end_label, comparison_var, cil_case_label, cil_end_label):
-    """
-    CaseClause = 'case' Const ':' DoBlock
-    """
-    print(get_indent() + 'parse_case_clause():')
-    with indent_manager():
-        parse_token('case', 'keyword')
-        if postfix_generator.get_postfix_code()[-1][0] != comparison_var:
-            postfix_generator.add_to_postfix(comparison_var, 'r-val')
-        if comparison_var not in cil_generator.get_top():
-            cil_generator.load_variable(comparison_var)
-
-        parse_expression()
-
-        postfix_generator.add_to_postfix('==', 'rel_op')
-        cil_generator.perform_relational_operation('==')
-
-        next_case_label = postfix_generator.new_label()
-        cil_next_case_label = cil_generator.new_label()
-
-        postfix_generator.add_conditional_jump(next_case_label)
-        cil_generator.add_conditional_jump(cil_next_case_label)
-
-        postfix_generator.add_label(case_label)
-        cil_generator.add_label(cil_case_label)
-
-        parse_token(':', 'punct')
-        parse_do_block()
-
-        postfix_generator.add_unconditional_jump(end_label)
-        cil_generator.add_unconditional_jump(cil_end_label)
-
-        postfix_generator.add_label(next_case_label)
-        cil_generator.add_label(cil_next_case_label)
-
-
-def parse_default_clause():
-    """
-    DefaultClause = 'default' ':' DoBlock
-    """
-    print(get_indent() + 'parse_default_clause():')
-    with indent_manager():
-        parse_token('default', 'keyword')
-        parse_token(':', 'punct')
-        parse_do_block()
-
-
-def parse_do_block():
-    """
-    DoBlock = Statement | Block
-    """
-    num_line, lexeme, tok = get_symbol()
-    if lexeme == '{':
-        parse_token('{', 'block_op')
-        with indent_manager():
-            while parse_statement():
-                pass
-        parse_token('}', 'block_op')
-    else:
-        parse_statement()
-
-
-def parse_output_expression_list():
-    print(get_indent() + 'parse_output_expression_list():')
-    with indent_manager():
-        expr_type = parse_expression()
-        postfix_generator.add_to_postfix('OUT', 'out')
-        cil_generator.write_output(expr_type)
-        while check_current_token(','):
-            parse_token(',', 'punct')
-            expr_type = parse_expression()
-            postfix_generator.add_to_postfix('OUT', 'out')
-            cil_generator.write_output(expr_type)
-
-
-def parse_input_identifier_list():
-    print(get_indent() + 'parse_input_identifier_list():')
-    with indent_manager():
-        identifiers = [parse_identifier()]
-        postfix_generator.add_to_postfix(identifiers[-1], 'r-val')
-        postfix_generator.add_to_postfix('IN', 'in')
-        while check_current_token(','):
-            parse_token(',', 'punct')
-            identifiers.append(parse_identifier())
-            postfix_generator.add_to_postfix(identifiers[-1], 'l-val')
-            postfix_generator.add_to_postfix('IN', 'in')
-        return identifiers
-
-
-def parse_expression():
-    """
-    Парсить Expression = ArithmExpression [ RelOp ArithmExpression ].
-    Повертає тип виразу.
-    """
-    print(get_indent() + 'parse_expression():')
-    with indent_manager():
-        left_type = parse_arithm_expression()
-        num_line, lexeme, tok = get_symbol()
-        if tok == 'rel_op':
-            print(f"{get_indent()}в рядку {num_line} - токен ({lexeme}, {tok})")
-            parse_token(lexeme, 'rel_op')
-            right_type = parse_arithm_expression()
-            postfix_generator.add_to_postfix(lexeme, 'rel_op')
-            cil_generator.perform_relational_operation(lexeme)
-
-            # Перевірка типів операндів реляційного оператора
-            if left_type not in ('int', 'float', 'intnum', 'floatnum') or right_type not in (
-                    'int', 'float', 'intnum', 'floatnum'):
-                fail_parse('Невірні типи операндів для реляційного оператора', (left_type, lexeme, right_type))
-
-            # Результат реляційного виразу завжди 'bool'
-            return 'bool'
+            self.fail_parse('невідповідний тип', (num_line, lexeme, tok))
+
+    def parse_main_section(self, body):
+        """
+        Функція для розбору основної секції main:
+        MainSection = 'func' 'main' '(' ')' '{' Statement { Statement | Declaration } '}'
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_main_section():')
+        with self.indent:
+            self.parse_token('func', 'keyword')
+            self.parse_token('main', 'keyword')
+            self.parse_token('(', 'brackets_op')
+            self.parse_token(')', 'brackets_op')
+            self.parse_token('{', 'block_op')
+            with self.indent:
+                while self.parse_statement(body) or self.parse_declaration(body):
+                    pass
+            self.parse_token('}', 'block_op')
+        if self.fill_lookahead(1):
+            extra_token = self.get_symbol()
+            self.fail_parse('Неочікуваний токен після завершення main', extra_token)
+
+    def parse_statement(self, body):
+        """
+        Функція для розбору інструкції (Statement).
+        Підтримує всі типи інструкцій згідно з граматикою; вузол інструкції додається до body.
+        """
+        num_line, lexeme, tok = self.get_symbol()
+        if tok == 'id' and self.check_next_token('='):
+            node = self.parse_assign()
+        elif lexeme == 'print':
+            node = self.parse_output_stmt()
+        elif lexeme == 'scan':
+            node = self.parse_input_stmt()
+        elif lexeme == 'for':
+            node = self.parse_for_stmt()
+        elif lexeme == 'while':
+            node = self.parse_while_stmt()
+        elif lexeme == 'if':
+            node = self.parse_if_stmt()
+        elif lexeme == 'switch':
+            node = self.parse_switch_stmt()
         else:
-            return left_type
-
-
-def parse_arithm_expression():
-    """
-    Парсить ArithmExpression = Term { AddOp Term } | [ Sign ] Term.
-    """
-    print(get_indent() + 'parse_arithm_expression():')
-    with indent_manager():
-        num_line, lexeme, tok = get_symbol()
-
-        if lexeme in ('+', '-') and tok == 'add_op':
-            print(f"{get_indent()}в рядку {num_line} - унарний оператор ({lexeme}, {tok})")
-            parse_token(lexeme, tok)
-            term_type = parse_term()
-
-            postfix_generator.add_to_postfix(lexeme, 'unary_op')
-            cil_generator.perform_unary_operation(lexeme)
+            return False
+        body.append(node)
+        return True
 
-            if term_type not in ('int', 'float', 'intnum', 'floatnum'):
-                fail_parse('Невірний тип операнда для унарного оператора', (lexeme, term_type))
-            expr_type = term_type
+    def parse_assign(self):
+        """
+        Функція для розбору інструкції присвоювання:
+        AssignmentStmt = Identifier '=' Expression ';'
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_assign():')
+        with self.indent:
+            num_line = self.get_symbol()[0]
+            ident = self.parse_identifier()
+            self.parse_token('=', 'assign_op')
+            value = self.parse_expression()
+            self.parse_token(';', 'punct')
+
+            self.initialize_variable(ident)
+            var_type = self.get_type_var(ident)
+            if var_type != value.type and not (var_type == 'floatnum' and value.type == 'intnum'):
+                self.fail_parse('Несумісні типи при присвоєнні', (ident, var_type, value.type))
+            return Assign(ident, var_type, value, num_line)
+
+    def parse_output_stmt(self):
+        """
+        Функція для розбору інструкції виведення:
+        OutputStmt = 'print' '(' ExpressionList ')' ';'
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_output_stmt():')
+        with self.indent:
+            num_line = self.get_symbol()[0]
+            self.parse_token('print', 'keyword')
+            self.parse_token('(', 'brackets_op')
+            values = self.parse_output_expression_list()
+            self.parse_token(')', 'brackets_op')
+            self.parse_token(';', 'punct')
+            return Print(values, num_line)
+
+    def parse_input_stmt(self):
+        """
+        Функція для розбору інструкції введення:
+        InputStmt = 'scan' '(' IdentifierList ')' ';'
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_input_stmt():')
+        with self.indent:
+            num_line = self.get_symbol()[0]
+            self.parse_token('scan', 'keyword')
+            self.parse_token('(', 'brackets_op')
+            identifiers = self.parse_input_identifier_list()
+            self.parse_token(')', 'brackets_op')
+            self.parse_token(';', 'punct')
+
+            targets = []
+            for ident in identifiers:
+                self.initialize_variable(ident)
+                targets.append((ident, self.get_type_var(ident)))
+            return Scan(targets, num_line)
+
+    def check_current_token(self, expected_lexeme):
+        num_line, lexeme, tok = self.get_symbol()
+        return lexeme == expected_lexeme
+
+    def check_next_token(self, expected_lexeme):
+        num_line, lexeme, tok = self.get_next_symbol()
+        return lexeme == expected_lexeme
+
+    def parse_for_stmt(self):
+        """
+        Функція для розбору інструкції ітеративного циклу:
+        ForStmt = 'for' '(' Identifier ':=' ArithmExpression ';' Expression ';' Identifier '=' ArithmExpression ')' DoBlock.
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_for_stmt():')
+        with self.indent:
+            num_line = self.get_symbol()[0]
+            self.parse_token('for', 'keyword')
+            self.parse_token('(', 'brackets_op')
+            init = self.parse_short_variable_decl()
+            condition = self.parse_expression()
+
+            self.parse_token(';', 'punct')
+            update_line = self.get_symbol()[0]
+            id = self.parse_identifier()
+            self.parse_token('=', 'assign_op')
+            update = Assign(id, self.get_type_var(id), self.parse_arithm_expression(), update_line)
+            self.parse_token(')', 'brackets_op')
+            body = self.parse_do_block()
+            return For(init, condition, update, body, num_line)
+
+    def parse_while_stmt(self):
+        """
+        Функція для розбору інструкції умовного циклу:
+        WhileStmt = 'while' Expression DoBlock
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_while_stmt():')
+        with self.indent:
+            num_line = self.get_symbol()[0]
+            self.parse_token('while', 'keyword')
+            condition = self.parse_expression()
+            body = self.parse_do_block()
+            return While(condition, body, num_line)
+
+    def parse_if_stmt(self):
+        """
+        Функція для розбору інструкції розгалуження:
+        IfStmt = 'if' Expression DoBlock [ 'else' DoBlock ]
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_if_stmt():')
+        with self.indent:
+            num_line = self.get_symbol()[0]
+            self.parse_token('if', 'keyword')
+            condition = self.parse_expression()
+            body = self.parse_do_block()
+            orelse = None
+            if self.check_current_token('else'):
+                self.parse_token('else', 'keyword')
+                orelse = self.parse_do_block()
+            return If(condition, body, orelse, num_line)
+
+    def parse_switch_stmt(self):
+        """
+        Функція для розбору інструкції багатонаправленого розгалуження:
+        SwitchStmt = 'switch' Expression '{' { CaseClause } [ DefaultClause ] '}'
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_switch_stmt():')
+        with self.indent:
+            num_line = self.get_symbol()[0]
+            self.parse_token('switch', 'keyword')
+            subject = self.parse_expression()
+            self.parse_token('{', 'block_op')
+
+            cases = []
+            default = None
+            with self.indent:
+                while self.check_current_token('case'):
+                    cases.append(self.parse_case_clause())
+                if self.check_current_token('default'):
+                    default = self.parse_default_clause()
+
+            self.parse_token('}', 'block_op')
+            return Switch(subject, cases, default, num_line)
+
+    def parse_case_clause(self):
+        """
+        CaseClause = 'case' Const ':' DoBlock
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_case_clause():')
+        with self.indent:
+            self.parse_token('case', 'keyword')
+            value = self.parse_expression()
+            self.parse_token(':', 'punct')
+            return value, self.parse_do_block()
+
+    def parse_default_clause(self):
+        """
+        DefaultClause = 'default' ':' DoBlock
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_default_clause():')
+        with self.indent:
+            self.parse_token('default', 'keyword')
+            self.parse_token(':', 'punct')
+            return self.parse_do_block()
+
+    def parse_do_block(self):
+        """
+        DoBlock = Statement | Block
+        Повертає список вузлів інструкцій.
+        """
+        body = []
+        num_line, lexeme, tok = self.get_symbol()
+        if lexeme == '{':
+            self.parse_token('{', 'block_op')
+            with self.indent:
+                while self.parse_statement(body):
+                    pass
+            self.parse_token('}', 'block_op')
         else:
-            expr_type = parse_term()
-
-        while True:
-            num_line, lexeme, tok = get_symbol()
-            if tok == 'add_op':
-                print(f"{get_indent()}в рядку {num_line} - токен ({lexeme}, {tok})")
-                parse_token(lexeme, tok)
-
-                cil_code_pointer = cil_generator.get_current_position()
-                term_type = parse_term()
-
-                if expr_type == 'intnum' and term_type == 'floatnum':
-                    cil_generator.insert_conversion_to_float_at(cil_code_pointer)
-                elif expr_type == 'floatnum' and term_type == 'intnum':
-                    cil_generator.add_conversion_to_float()
-
-                result_type = get_type_op(expr_type, lexeme, term_type)
-                if result_type == 'type_error':
-                    fail_parse('Несумісні типи в арифметичній операції', (expr_type, lexeme, term_type))
-                expr_type = result_type
-
-                postfix_generator.add_to_postfix(lexeme, 'add_op')
-                cil_generator.perform_binary_operation(lexeme)
+            self.parse_statement(body)
+        return body
+
+    def parse_output_expression_list(self):
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_output_expression_list():')
+        with self.indent:
+            values = [self.parse_expression()]
+            while self.check_current_token(','):
+                self.parse_token(',', 'punct')
+                values.append(self.parse_expression())
+            return values
+
+    def parse_input_identifier_list(self):
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_input_identifier_list():')
+        with self.indent:
+            identifiers = [self.parse_identifier()]
+            while self.check_current_token(','):
+                self.parse_token(',', 'punct')
+                identifiers.append(self.parse_identifier())
+            return identifiers
+
+    def parse_expression(self):
+        """
+        Парсить Expression = ArithmExpression [ RelOp ArithmExpression ].
+        Повертає вузол виразу з його типом.
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_expression():')
+        with self.indent:
+            left = self.parse_arithm_expression()
+            num_line, lexeme, tok = self.get_symbol()
+            if tok == 'rel_op':
+                if self.tracing:
+                    self.trace(f"{self.get_indent()}в рядку {num_line} - токен ({lexeme}, {tok})")
+                self.parse_token(lexeme, 'rel_op')
+                right = self.parse_arithm_expression()
+
+                # Перевірка типів операндів реляційного оператора
+                if left.type not in ('int', 'float', 'intnum', 'floatnum') or right.type not in (
+                        'int', 'float', 'intnum', 'floatnum'):
+                    self.fail_parse('Невірні типи операндів для реляційного оператора', (left.type, lexeme, right.type))
+
+                # Результат реляційного виразу завжди 'bool'
+                return Binary(lexeme, left, right, 'bool')
             else:
-                break
-        return expr_type
-
-
-def parse_term():
-    """
-    Парсить Term = Factor { MultOp Factor }.
-    Повертає тип виразу.
-    """
-    print(get_indent() + 'parse_term():')
-    with indent_manager():
-        term_type = parse_factor()
-
-        while True:
-            num_line, lexeme, tok = get_symbol()
-            if tok == 'mult_op':
-                print(f"{get_indent()}в рядку {num_line} - токен ({lexeme}, {tok})")
-                parse_token(lexeme, tok)
-                factor_type = parse_factor()
-                postfix_generator.add_to_postfix(lexeme, 'mult_op')
-                cil_generator.perform_binary_operation(lexeme)
-                result_type = get_type_op(term_type, lexeme, factor_type)
+                return left
+
+    def parse_arithm_expression(self):
+        """
+        Парсить ArithmExpression = Term { AddOp Term } | [ Sign ] Term.
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_arithm_expression():')
+        with self.indent:
+            num_line, lexeme, tok = self.get_symbol()
+
+            if lexeme in ('+', '-') and tok == 'add_op':
+                if self.tracing:
+                    self.trace(f"{self.get_indent()}в рядку {num_line} - унарний оператор ({lexeme}, {tok})")
+                self.parse_token(lexeme, tok)
+                term = self.parse_term()
+
+                if term.type not in ('int', 'float', 'intnum', 'floatnum'):
+                    self.fail_parse('Невірний тип операнда для унарного оператора', (lexeme, term.type))
+                expr = Unary(lexeme, term, term.type)
+            else:
+                expr = self.parse_term()
+
+            while True:
+                num_line, lexeme, tok = self.get_symbol()
+                if tok == 'add_op':
+                    if self.tracing:
+                        self.trace(f"{self.get_indent()}в рядку {num_line} - токен ({lexeme}, {tok})")
+                    self.parse_token(lexeme, tok)
+                    term = self.parse_term()
+
+                    result_type = get_type_op(expr.type, lexeme, term.type)
+                    if result_type == 'type_error':
+                        self.fail_parse('Несумісні типи в арифметичній операції', (expr.type, lexeme, term.type))
+                    expr = Binary(lexeme, expr, term, result_type)
+                else:
+                    break
+            return expr
+
+    def parse_term(self):
+        """
+        Парсить Term = Factor { MultOp Factor }.
+        Повертає вузол виразу з його типом.
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_term():')
+        with self.indent:
+            term = self.parse_factor()
+
+            while True:
+                num_line, lexeme, tok = self.get_symbol()
+                if tok == 'mult_op':
+                    if self.tracing:
+                        self.trace(f"{self.get_indent()}в рядку {num_line} - токен ({lexeme}, {tok})")
+                    self.parse_token(lexeme, tok)
+                    factor = self.parse_factor()
+                    result_type = get_type_op(term.type, lexeme, factor.type)
+                    if result_type == 'type_error':
+                        self.fail_parse('Несумісні типи в множенні/діленні', (term.type, lexeme, factor.type))
+                    term = Binary(lexeme, term, factor, result_type)
+                else:
+                    break
+            return term
+
+    def parse_factor(self):
+        """
+        Парсить Factor = Primary [ PowerOp Factor ].
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_factor():')
+        with self.indent:
+            factor = self.parse_primary()
+
+            num_line, lexeme, tok = self.get_symbol()
+            if tok == 'power_op':
+                if self.tracing:
+                    self.trace(f"{self.get_indent()}в рядку {num_line} - токен ({lexeme}, {tok})")
+                self.parse_token(lexeme, tok)
+
+                exponent = self.parse_factor()
+                result_type = get_type_op(factor.type, lexeme, exponent.type)
                 if result_type == 'type_error':
-                    fail_parse('Несумісні типи в множенні/діленні', (term_type, lexeme, factor_type))
-                term_type = result_type
+                    self.fail_parse('Несумісні типи в операції піднесення до степеня', (factor.type, lexeme, exponent.type))
+                factor = Binary(lexeme, factor, exponent, result_type)
+            return factor
+
+    def parse_primary(self):
+        """
+        Parses Primary = Identifier | NumConst | BoolConst | '(' Expression ')'.
+        """
+        if self.tracing:
+            self.trace(self.get_indent() + 'parse_primary():')
+        with self.indent:
+            num_line, lexeme, tok = self.get_symbol()
+            if tok in ('intnum', 'floatnum'):
+                if self.tracing:
+                    self.trace(f"{self.get_indent()}в рядку {num_line} - токен ({lexeme}, {tok})")
+                self.parse_token(lexeme, tok)
+                return Const(lexeme, tok)
+            elif tok == 'boolval':
+                if self.tracing:
+                    self.trace(f"{self.get_indent()}в рядку {num_line} - токен ({lexeme}, {tok})")
+                self.parse_token(lexeme, tok)
+                return Const(lexeme, 'bool')
+            elif tok == 'id':
+                if self.tracing:
+                    self.trace(f"{self.get_indent()}в рядку {num_line} - токен ({lexeme}, {tok})")
+                self.parse_token(lexeme, tok)
+                self.is_init_var(lexeme)
+                return Var(lexeme, self.get_type_var(lexeme))
+            elif lexeme == '(' and tok == 'brackets_op':
+                if self.tracing:
+                    self.trace(f"{self.get_indent()}в рядку {num_line} - токен ({lexeme}, {tok})")
+                self.parse_token('(', 'brackets_op')
+                expr = self.parse_expression()
+                self.parse_token(')', 'brackets_op')
+                return expr
             else:
-                break
-        return term_type
-
-
-def parse_factor():
-    """
-    Парсить Factor = Primary [ PowerOp Factor ].
-    """
-    print(get_indent() + 'parse_factor():')
-    with indent_manager():
-        factor_type = parse_primary()
+                self.fail_parse('невідповідність у Primary', (num_line, lexeme, tok))
 
-        num_line, lexeme, tok = get_symbol()
-        if tok == 'power_op':
-            if factor_type == "intnum":
-                cil_generator.add_conversion_to_float()
+    def parse_token(self, expected_lexeme, expected_token):
+        if not self.fill_lookahead(1):
+            self.fail_parse('неочікуваний кінець програми', (expected_lexeme, expected_token, self.num_row))
 
-            print(f"{get_indent()}в рядку {num_line} - токен ({lexeme}, {tok})")
-            parse_token(lexeme, tok)
+        num_line, lexeme, token = self.get_symbol()
+        self.advance()
 
-            primary_type = parse_factor()
-            if primary_type == "intnum":
-                cil_generator.add_conversion_to_float()
-
-            postfix_generator.add_to_postfix(lexeme, 'power_op')
-            cil_generator.perform_binary_operation(lexeme)
-            result_type = get_type_op(factor_type, lexeme, primary_type)
-            if result_type == 'type_error':
-                fail_parse('Несумісні типи в операції піднесення до степеня', (factor_type, lexeme, primary_type))
-            factor_type = result_type
-        return factor_type
-
-
-def parse_primary():
-    """
-    Parses Primary = Identifier | NumConst | BoolConst | '(' Expression ')'.
-    """
-    print(get_indent() + 'parse_primary():')
-    with indent_manager():
-        num_line, lexeme, tok = get_symbol()
-        if tok in ('intnum', 'floatnum'):
-            print(f"{get_indent()}в рядку {num_line} - токен ({lexeme}, {tok})")
-            parse_token(lexeme, tok)
-            postfix_generator.add_to_postfix(lexeme, tok)
-            cil_generator.load_constant(lexeme, tok)
-            return tok
-        elif tok == 'boolval':
-            print(f"{get_indent()}в рядку {num_line} - токен ({lexeme}, {tok})")
-            parse_token(lexeme, tok)
-            postfix_generator.add_to_postfix(lexeme, tok)
-            cil_generator.load_constant(lexeme, 'bool')
-            return 'bool'
-        elif tok == 'id':
-            print(f"{get_indent()}в рядку {num_line} - токен ({lexeme}, {tok})")
-            parse_token(lexeme, tok)
-            postfix_generator.add_to_postfix(lexeme, 'r-val')
-            cil_generator.load_variable(lexeme)
-            is_init_var(lexeme)
-            return get_type_var(lexeme)
-        elif lexeme == '(' and tok == 'brackets_op':
-            print(f"{get_indent()}в рядку {num_line} - токен ({lexeme}, {tok})")
-            parse_token('(', 'brackets_op')
-            expr_type = parse_expression()
-            parse_token(')', 'brackets_op')
-            return expr_type
+        if (lexeme, token) == (expected_lexeme, expected_token):
+            if self.tracing:
+                self.trace(f"{self.get_indent()}parse_token: В рядку {num_line} - токен {(expected_lexeme, expected_token)}")
+            return True
         else:
-            fail_parse('невідповідність у Primary', (num_line, lexeme, tok))
+            self.fail_parse('невідповідність токенів', (num_line, lexeme, token, expected_lexeme, expected_token))
+            return False
 
+    def parse_identifier(self):
+        if not self.fill_lookahead(1):
+            self.fail_parse('неочікуваний кінець програми', ('<ідентифікатор>', 'id', self.num_row))
 
-def parse_token(expected_lexeme, expected_token):
-    global num_row
+        num_line, lexeme, token = self.get_symbol()
+        self.advance()
 
-    if num_row > len_table_of_symbols:
-        fail_parse('неочікуваний кінець програми', (expected_lexeme, expected_token, num_row))
+        if token == 'id':
+            if self.tracing:
+                self.trace(f"{self.get_indent()}parseIdentifier: В рядку {num_line} - ідентифікатор {lexeme}")
+        else:
+            self.fail_parse('невідповідність токенів', (num_line, lexeme, token, '<ідентифікатор>', 'id'))
 
-    num_line, lexeme, token = get_symbol()
-    num_row += 1
+        return lexeme
 
-    if (lexeme, token) == (expected_lexeme, expected_token):
-        print(f"{get_indent()}parse_token: В рядку {num_line} - токен {(expected_lexeme, expected_token)}")
+    def fill_lookahead(self, count):
+        """
+        Дочитує з джерела лексем стільки записів, щоб у буфері self.lookahead їх було не менше count.
+        :return: False, якщо програма закінчилася раніше
+        """
+        while len(self.lookahead) < count:
+            try:
+                symbol = next(self.token_source, None)
+            except SystemExit as e:
+                self.log('Lexer: Аварійне завершення програми з кодом {0}'.format(e))
+                raise
+            if symbol is None:
+                return False
+            self.lookahead.append(symbol)
         return True
-    else:
-        fail_parse('невідповідність токенів', (num_line, lexeme, token, expected_lexeme, expected_token))
-        return False
-
-
-def parse_identifier():
-    global num_row
-
-    if num_row > len_table_of_symbols:
-        fail_parse('неочікуваний кінець програми', ('<ідентифікатор>', 'id', num_row))
-
-    num_line, lexeme, token = get_symbol()
-    num_row += 1
-
-    if token == 'id':
-        print(f"{get_indent()}parseIdentifier: В рядку {num_line} - ідентифікатор {lexeme}")
-    else:
-        fail_parse('невідповідність токенів', (num_line, lexeme, token, '<ідентифікатор>', 'id'))
-
-    return lexeme
 
-
-def get_symbol():
-    if num_row > len_table_of_symbols:
-        fail_parse('get_symbol(): неочікуваний кінець програми', num_row)
-    num_line, lexeme, token, _ = table_of_symbols[num_row]
-    return num_line, lexeme, token
-
-
-def get_next_symbol():
-    if num_row + 1 > len_table_of_symbols:
-        fail_parse('get_next_symbol(): неочікуваний кінець програми', num_row + 1)
-    num_line, lexeme, token, _ = table_of_symbols[num_row + 1]
-    return num_line, lexeme, token
-
-
-def fail_parse(message, details):
-    print(f'Parser ERROR: {message} - {details}')
-    exit(1)
-
-
-# Семантичний аналіз, таблиця змінних
-table_of_variables = {}
-
-
-# Функція для обробки оголошення змінної
-def proc_table_of_var(lexeme, var_type, value='undefined'):
-    if lexeme in table_of_variables:
-        fail_parse('повторне оголошення змінної', (lexeme, var_type))
-    else:
-        indx = len(table_of_variables) + 1
-        table_of_variables[lexeme] = (indx, var_type, value)
-
-
-# Функція для отримання типу змінної
-def get_type_var(ident):
-    try:
-        return table_of_variables[ident][1]
-    except KeyError:
-        return 'undeclared_variable'
-
-
-# Функція для перевірки ініціалізації змінної
-def is_init_var(lexeme):
-    if lexeme not in table_of_variables:
-        fail_parse('використання неоголошеної змінної', (lexeme))
-    else:
-        if table_of_variables[lexeme][2] != 'assigned':
-            fail_parse('використання змінної без значення', (lexeme))
-
-
-# Функція для встановлення статусу ініціалізації змінної
-def initialize_variable(ident):
-    if ident in table_of_variables:
-        indx, var_type, _ = table_of_variables[ident]
-        if var_type in ['int', 'float']:
-            var_type += 'num'
-        table_of_variables[ident] = (indx, var_type, 'assigned')
-    else:
-        fail_parse("використання неоголошеної змінної", ident)
+    def advance(self):
+        self.lookahead.popleft()
+        self.num_row += 1
+
+    def get_symbol(self):
+        if not self.fill_lookahead(1):
+            self.fail_parse('get_symbol(): неочікуваний кінець програми', self.num_row)
+        num_line, lexeme, token, _ = self.lookahead[0]
+        return num_line, lexeme, token
+
+    def get_next_symbol(self):
+        if not self.fill_lookahead(2):
+            self.fail_parse('get_next_symbol(): неочікуваний кінець програми', self.num_row + 1)
+        num_line, lexeme, token, _ = self.lookahead[1]
+        return num_line, lexeme, token
+
+    def fail_parse(self, message, details):
+        self.error = f'{message} - {details}'
+        self.log(f'Parser ERROR: {self.error}')
+        exit(1)
+
+    # Функція для обробки оголошення змінної
+    def proc_table_of_var(self, lexeme, var_type, value='undefined'):
+        if lexeme in self.table_of_variables:
+            self.fail_parse('повторне оголошення змінної', (lexeme, var_type))
+        else:
+            indx = len(self.table_of_variables) + 1
+            self.table_of_variables[lexeme] = (indx, var_type, value)
+
+    # Функція для отримання типу змінної
+    def get_type_var(self, ident):
+        try:
+            return self.table_of_variables[ident][1]
+        except KeyError:
+            return 'undeclared_variable'
+
+    # Функція для перевірки ініціалізації змінної
+    def is_init_var(self, lexeme):
+        if lexeme not in self.table_of_variables:
+            self.fail_parse('використання неоголошеної змінної', (lexeme))
+        else:
+            if self.table_of_variables[lexeme][2] != 'assigned':
+                self.fail_parse('використання змінної без значення', (lexeme))
+
+    # Функція для встановлення статусу ініціалізації змінної
+    def initialize_variable(self, ident):
+        if ident in self.table_of_variables:
+            indx, var_type, _ = self.table_of_variables[ident]
+            if var_type in ['int', 'float']:
+                var_type += 'num'
+            self.table_of_variables[ident] = (indx, var_type, 'assigned')
+        else:
+            self.fail_parse("використання неоголошеної змінної", ident)
 
 
 # Функція для обчислення типу операцій
@@ -775,11 +694,17 @@ def get_type_op(l_type, op, r_type):
 
 
 # Запуск парсера
-if f_success == ('Lexer', True):
-    print(('len_table_of_symbols', len_table_of_symbols))
-    run_parser()
-
-    postfix_generator.set_variables(table_of_variables)
-    cil_generator.set_variables(table_of_variables)
-    postfix_generator.save_to_file('test.postfix')
-    cil_generator.save_to_file('test.cil')
+if __name__ == '__main__':
+    import sys
+    from compile_cache import CompileCache
+    from compiler import Compiler, DIAG_ERRORS, DIAG_SUMMARY, DIAG_TRACE
+
+    # --no-cache - компілювати без кешу, --clear-cache - очистити кеш перед компіляцією,
+    # --verbose - підсумкові повідомлення, --trace - трасування лексем і правил граматики,
+    # -O0 - генерувати код без оптимізацій
+    cache = None if '--no-cache' in sys.argv else CompileCache()
+    if '--clear-cache' in sys.argv:
+        CompileCache().clear()
+    level = DIAG_TRACE if '--trace' in sys.argv else DIAG_SUMMARY if '--verbose' in sys.argv else DIAG_ERRORS
+    optimize = 0 if '-O0' in sys.argv else 1
+    Compiler(log=print, cache=cache, level=level, optimize=optimize).compile_file('test.mgo').save('test')
@@ -0,0 +1,100 @@
+import struct
+
+# Binary postfix program layout (.psmb), little-endian:
+#   header      MAGIC, version, flags and the string/variable/label/constant/instruction counts
+#   strings     u32 lengths followed by the UTF-8 bytes of every lexeme, name and type
+#   .vars       (name, type) as string pool indexes
+#   .labels     (name, instruction number)
+#   .constants  (lexeme, token code)
+#   .code       (token code u8, lexeme u32)
+#   debug       text listing line of every instruction, present when FLAG_DEBUG is set
+
+MAGIC = b'PSMB'
+VERSION = 1
+FLAG_DEBUG = 1
+
+TOKENS = ('l-val', 'r-val', 'intnum', 'floatnum', 'boolval', 'label', 'jump', 'jf', 'colon', 'out', 'in',
+          'unary_op', 'assign_op', 'add_op', 'mult_op', 'power_op', 'rel_op')
+TOKEN_CODES = {token: code for code, token in enumerate(TOKENS)}
+
+HEADER = struct.Struct('<4sHHIIIII')
+PAIR = struct.Struct('<II')
+CONSTANT = struct.Struct('<IB')
+INSTRUCTION = struct.Struct('<BI')
+
+
+class BinaryFormatError(Exception):
+    pass
+
+
+def encode(variables, labels, constants, postfix_code, debug_lines=None):
+    strings = {}
+
+    def intern(text):
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(strings)
+        return index
+
+    var_data = b''.join(PAIR.pack(intern(name), intern(var_type)) for name, var_type in variables)
+    label_data = b''.join(PAIR.pack(intern(name), value) for name, value in labels)
+    const_data = b''.join(CONSTANT.pack(intern(value), TOKEN_CODES[token]) for value, token in constants)
+    code_data = b''.join(INSTRUCTION.pack(TOKEN_CODES[token], intern(lexeme)) for lexeme, token in postfix_code)
+
+    encoded = [text.encode() for text in strings]
+    flags = FLAG_DEBUG if debug_lines is not None else 0
+    parts = [
+        HEADER.pack(MAGIC, VERSION, flags, len(encoded), len(variables), len(labels), len(constants),
+                    len(postfix_code)),
+        struct.pack(f'<{len(encoded)}I', *map(len, encoded)),
+        b''.join(encoded),
+        var_data,
+        label_data,
+        const_data,
+        code_data
+    ]
+    if debug_lines is not None:
+        parts.append(struct.pack(f'<{len(debug_lines)}I', *debug_lines))
+    return b''.join(parts)
+
+
+def decode(data):
+    """
+    Parses a binary program in one pass over a memoryview.
+    Returns (variables, labels, constants, postfix_code, debug_lines); debug_lines is None
+    when the program has no debug section.
+    """
+    view = memoryview(data)
+    if len(view) < HEADER.size:
+        raise BinaryFormatError('truncated header')
+    magic, version, flags, n_strings, n_vars, n_labels, n_consts, n_code = HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION:
+        raise BinaryFormatError('not a PSM binary program')
+    offset = HEADER.size
+    try:
+        lengths = struct.unpack_from(f'<{n_strings}I', view, offset)
+        offset += 4 * n_strings
+        strings = []
+        for length in lengths:
+            strings.append(str(view[offset:offset + length], 'utf-8'))
+            offset += length
+
+        def section(layout, count):
+            nonlocal offset
+            size = layout.size * count
+            if offset + size > len(view):
+                raise BinaryFormatError('truncated section')
+            rows = layout.iter_unpack(view[offset:offset + size])
+            offset += size
+            return rows
+
+        variables = [(strings[name], strings[var_type]) for name, var_type in section(PAIR, n_vars)]
+        labels = [(strings[name], value) for name, value in section(PAIR, n_labels)]
+        constants = [(strings[value], TOKENS[token]) for value, token in section(CONSTANT, n_consts)]
+        postfix_code = [(strings[lexeme], TOKENS[token]) for token, lexeme in section(INSTRUCTION, n_code)]
+        debug_lines = None
+        if flags & FLAG_DEBUG:
+            debug_lines = list(struct.unpack_from(f'<{n_code}I', view, offset))
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise BinaryFormatError(str(e))
+    return variables, labels, constants, postfix_code, debug_lines
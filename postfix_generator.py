@@ -1,3 +1,9 @@
+from optimizer import optimize_postfix
+from postfix_binary import encode
+
+OPERATOR_TOKENS = {'+': 'add_op', '-': 'add_op', '*': 'mult_op', '/': 'mult_op', '%': 'mult_op', '**': 'power_op'}
+
+
 class PostfixGenerator:
     def __init__(self):
         self.variables = []
@@ -31,31 +37,134 @@ class PostfixGenerator:
         self.add_to_postfix(f'{label}', 'label')
         self.add_to_postfix(f'JMP', 'jump')
 
+    def optimize(self):
+        self.postfix_code, self.labels = optimize_postfix(self.postfix_code, self.labels)
+        self.constants = {(lex, tok) for lex, tok in self.postfix_code if tok in ('intnum', 'floatnum', 'boolval')}
+
     def set_variables(self, table_of_variables):
         for name, (id_num, var_type, status) in table_of_variables.items():
             self.variables.append((name, var_type))
 
+    def generate(self, program):
+        for node in program.body:
+            self.statement(node)
+
+    def statement(self, node):
+        getattr(self, 'statement_' + type(node).__name__)(node)
+
+    def block(self, body):
+        for node in body:
+            self.statement(node)
+
+    def statement_Assign(self, node):
+        self.add_to_postfix(node.name, 'l-val')
+        self.expression(node.value)
+        self.add_to_postfix('=', 'assign_op')
+
+    def statement_Print(self, node):
+        for value in node.values:
+            self.expression(value)
+            self.add_to_postfix('OUT', 'out')
+
+    def statement_Scan(self, node):
+        for name, _ in node.targets:
+            self.add_to_postfix(name, 'l-val')
+            self.add_to_postfix('IN', 'in')
+
+    def statement_If(self, node):
+        label_else = self.new_label()
+        self.expression(node.condition)
+        self.add_conditional_jump(label_else)
+        self.block(node.body)
+        if node.orelse is None:
+            self.add_label(label_else)
+            return
+        label_end = self.new_label()
+        self.add_unconditional_jump(label_end)
+        self.add_label(label_else)
+        self.block(node.orelse)
+        self.add_label(label_end)
+
+    def statement_While(self, node):
+        label_start = self.new_label()
+        label_end = self.new_label()
+        self.add_label(label_start)
+        self.expression(node.condition)
+        self.add_conditional_jump(label_end)
+        self.block(node.body)
+        self.add_unconditional_jump(label_start)
+        self.add_label(label_end)
+
+    def statement_For(self, node):
+        label_start = self.new_label()
+        label_end = self.new_label()
+        self.statement_Assign(node.init)
+        self.add_label(label_start)
+        self.expression(node.condition)
+        self.add_conditional_jump(label_end)
+        self.block(node.body)
+        self.statement_Assign(node.update)
+        self.add_unconditional_jump(label_start)
+        self.add_label(label_end)
+
+    def statement_Switch(self, node):
+        label_end = self.new_label()
+        for value, body in node.cases:
+            label_next = self.new_label()
+            self.expression(node.subject)
+            self.expression(value)
+            self.add_to_postfix('==', 'rel_op')
+            self.add_conditional_jump(label_next)
+            self.block(body)
+            self.add_unconditional_jump(label_end)
+            self.add_label(label_next)
+        if node.default is not None:
+            self.block(node.default)
+        self.add_label(label_end)
+
+    def expression(self, node):
+        kind = type(node).__name__
+        if kind == 'Const':
+            self.add_to_postfix(node.value, 'boolval' if node.type == 'bool' else node.type)
+        elif kind == 'Var':
+            self.add_to_postfix(node.name, 'r-val')
+        elif kind == 'Unary':
+            self.expression(node.operand)
+            if node.op == '-':
+                self.add_to_postfix('-', 'unary_op')
+        else:
+            self.expression(node.left)
+            self.expression(node.right)
+            self.add_to_postfix(node.op, OPERATOR_TOKENS.get(node.op, 'rel_op'))
+
+    def to_text(self):
+        lines = [".target: PSM", ".version: 1.0", "", ".vars("]
+        for name, var_type in self.variables:
+            lines.append(f"   {name:<12} {var_type:<15}")
+        lines += [")", "", ".labels("]
+        for name, value in self.labels:
+            lines.append(f"   {name:<12} {value:<15}")
+        lines += [")", "", ".constants("]
+        for value, const_type in self.constants:
+            lines.append(f"   {value:<12} {const_type:<15}")
+        lines += [")", "", ".code("]
+        for element in self.postfix_code:
+            lines.append(f"   {element[0]:<12} {element[1]: <15}")
+        lines.append(")")
+        return '\n'.join(lines) + '\n'
+
+    def to_binary(self, debug=True):
+        constants = list(self.constants)
+        debug_lines = None
+        if debug:
+            first_code_line = len(self.variables) + len(self.labels) + len(constants) + 14
+            debug_lines = range(first_code_line, first_code_line + len(self.postfix_code))
+        return encode(self.variables, self.labels, constants, self.postfix_code, debug_lines)
+
     def save_to_file(self, filename):
         with open(filename, 'w') as f:
-            f.write(".target: PSM\n")
-            f.write(".version: 1.0\n\n")
-
-            f.write(".vars(\n")
-            for name, var_type in self.variables:
-                f.write(f"   {name:<12} {var_type:<15}\n")
-            f.write(")\n\n")
-
-            f.write(".labels(\n")
-            for name, value in self.labels:
-                f.write(f"   {name:<12} {value:<15}\n")
-            f.write(")\n\n")
-
-            f.write(".constants(\n")
-            for value, const_type in self.constants:
-                f.write(f"   {value:<12} {const_type:<15}\n")
-            f.write(")\n\n")
-
-            f.write(".code(\n")
-            for element in self.postfix_code:
-                f.write(f"   {element[0]:<12} {element[1]: <15}\n")
-            f.write(")\n")
+            f.write(self.to_text())
+
+    def save_to_binary(self, filename, debug=True):
+        with open(filename, 'wb') as f:
+            f.write(self.to_binary(debug))
@@ -1,11 +1,79 @@
+import math
+import operator
+import time
+from collections import namedtuple
+
 from tabulate import tabulate
 
+from postfix_binary import BinaryFormatError, decode as decode_binary
+from psm_io import BufferedOutput, make_input_source
+from psm_profile import InstructionProfile
+
+OP_PUSH, OP_LOAD, OP_NOP, OP_JUMP, OP_JF, OP_OUT, OP_IN, OP_NEG, OP_ASSIGN, \
+    OP_ARITHMETIC, OP_DIV, OP_RELATIONAL, OP_INCREMENT, OP_LOAD_ADD_STORE, OP_COMPARE_JF, OP_UNDECLARED, \
+    OP_BAD_JUMP, OP_INVALID = range(18)
+
+OPCODE_NAMES = ('push', 'load', 'nop', 'jump', 'jf', 'out', 'in', 'neg', 'assign', 'arithmetic', 'div', 'relational',
+                'increment', 'load_add_store', 'compare_jf', 'undeclared', 'bad_jump', 'invalid')
+
+OPT_NONE, OPT_SUPERINSTRUCTIONS = range(2)
+
+UNDEFINED = 'val_undef'
+
+TRACE_SILENT, TRACE_LOAD, TRACE_EXECUTION = range(3)
+
+VALUE_TYPES = {int: 'intnum', float: 'floatnum', bool: 'boolval'}
+
+RELATIONAL_OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne
+}
+
+COMPARABLE_TYPES = {(int, int), (float, float), (int, float), (float, int), (bool, bool)}
+
+TOKEN_OPCODES = {
+    'jump': OP_JUMP,
+    'jf': OP_JF,
+    'colon': OP_NOP,
+    'out': OP_OUT,
+    'in': OP_IN
+}
+
+OPERATOR_OPCODES = {
+    ('-', 'unary_op'): (OP_NEG, None),
+    ('=', 'assign_op'): (OP_ASSIGN, None),
+    ('+', 'add_op'): (OP_ARITHMETIC, operator.add),
+    ('-', 'add_op'): (OP_ARITHMETIC, operator.sub),
+    ('*', 'mult_op'): (OP_ARITHMETIC, operator.mul),
+    ('%', 'mult_op'): (OP_ARITHMETIC, operator.mod),
+    ('/', 'mult_op'): (OP_DIV, None),
+    ('**', 'power_op'): (OP_ARITHMETIC, operator.pow),
+    **{(rel, 'rel_op'): (OP_RELATIONAL, function) for rel, function in RELATIONAL_OPERATORS.items()}
+}
+
+STATIC_TYPES = {value_type: python_type for python_type, value_type in VALUE_TYPES.items()}
+
+ARITHMETIC_OPERATORS = {
+    lex: function for (lex, tok), (opcode, function) in OPERATOR_OPCODES.items() if opcode == OP_ARITHMETIC
+}
+
+
+Address = namedtuple('Address', 'slot name')
+
 
 class PSMException(Exception):
     def __init__(self, msg):
         self.msg = msg
 
 
+class PostfixCompileError(Exception):
+    pass
+
+
 def i2f(int_val):
     if isinstance(int_val, int):
         return float(int_val)
@@ -20,6 +88,18 @@ def f2i(float_val):
         return float_val
 
 
+def format_value(value):
+    if value.__class__ is bool:
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def describe_operand(value):
+    if value.__class__ is Address:
+        return value.name
+    return format_value(value)
+
+
 def get_value(lex, tok):
     if tok == 'floatnum':
         return float(lex)
@@ -31,13 +111,87 @@ def get_value(lex, tok):
         return lex
 
 
+def is_constant(value):
+    return value.__class__ in VALUE_TYPES
+
+
+def check_operand_types(left, right):
+    if left.__class__ is not right.__class__ or left.__class__ not in VALUE_TYPES:
+        raise PSMException(9)
+
+
+def checked_arithmetic(operator_lexeme, left, right):
+    check_operand_types(left, right)
+    return ARITHMETIC_OPERATORS[operator_lexeme](left, right)
+
+
+def checked_divide(left, right):
+    check_operand_types(left, right)
+    if left.__class__ is float:
+        return left / right
+    return f2i(left / right)
+
+
+def checked_compare(operator_lexeme, left, right):
+    if (left.__class__, right.__class__) not in COMPARABLE_TYPES:
+        raise PSMException(9)
+    return RELATIONAL_OPERATORS[operator_lexeme](left, right)
+
+
+def checked_negate(value):
+    if value.__class__ not in (int, float):
+        raise PSMException(9)
+    return -value
+
+
+def checked_assign(var_type, value):
+    value_type = VALUE_TYPES.get(value.__class__)
+    if var_type == 'floatnum' and value_type == 'intnum':
+        return float(value)
+    if var_type != value_type:
+        raise PSMException(7)
+    return value
+
+
+def checked_input(expected_type, value):
+    value_type = VALUE_TYPES.get(value.__class__)
+    if expected_type == 'floatnum' and value_type == 'intnum':
+        return float(value)
+    if expected_type != value_type:
+        raise PSMException(9)
+    return value
+
+
+def make_trace_sink(target):
+    if target is None:
+        return print
+    if callable(target):
+        return target
+    if hasattr(target, 'write'):
+        return lambda message: target.write(f'{message}\n')
+    if hasattr(target, 'append'):
+        return target.append
+    raise TypeError(f'Unsupported trace sink {target!r}')
+
+
 class PostfixStackMachine:
-    def __init__(self):
+    def __init__(self, verbosity=0, trace=None, output=None, input_source=None, optimize=OPT_SUPERINSTRUCTIONS,
+                 profile=False):
+        self.verbosity = verbosity
+        self.optimize = optimize
+        # Profiled runs use the interpreter: compiled code has no instruction boundaries to count
+        self.profile = InstructionProfile() if profile else None
+        self.trace = make_trace_sink(trace)
+        self.output = output if isinstance(output, BufferedOutput) else BufferedOutput(output)
+        self.input = make_input_source(input_source)
         self.table_of_id = {}
+        self.values = []
+        self.var_types = []
         self.table_of_label = {}
         self.table_of_const = {}
         self.postfix_code = []
         self.debug_map = {}
+        self.code_origin = []
         self.line_number = 0
         self.filename = ""
         self.file = None
@@ -56,21 +210,95 @@ class PostfixStackMachine:
             7: "Variable type differs from value type",
             8: "Uninitialized variable",
             9: "Operand types differ",
-            10: "Division by zero"
+            10: "Division by zero",
+            11: "Input values are exhausted",
+            12: "Jump to an undefined label",
+            13: "Arithmetic overflow"
         }
         self.stack = []
+        self.code = []
+        self.opcode_names = OPCODE_NAMES
+        self.error = None
+        self.handlers = self._build_handlers()
+        self.compiled_program = None
         self.instruction_pointer = 0
         self.max_instructions = 0
 
+    def _build_handlers(self):
+        return [
+            self._op_push,
+            self._op_load,
+            self._op_nop,
+            self._op_jump,
+            self._op_jf,
+            self._op_out,
+            self._op_in,
+            self._op_neg,
+            self._op_assign,
+            self._op_arithmetic,
+            self._op_div,
+            self._op_relational,
+            self._op_increment,
+            self._op_load_add_store,
+            self._op_compare_jf,
+            self._op_undeclared,
+            self._op_bad_jump,
+            self._op_invalid
+        ]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for attribute in ('file', 'handlers', 'compiled_program', 'trace'):
+            del state[attribute]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.file = None
+        self.handlers = self._build_handlers()
+        self.compiled_program = None
+        self.trace = print
+
+    def fork(self, input_source=None, output=None):
+        machine = type(self)(self.verbosity, self.trace, output, input_source, self.optimize, self.profile is not None)
+        for attribute in ('table_of_id', 'var_types', 'table_of_label', 'table_of_const', 'postfix_code',
+                          'debug_map', 'filename', 'code', 'code_origin', 'opcode_names', 'compiled_program'):
+            setattr(machine, attribute, getattr(self, attribute))
+        machine.values = [UNDEFINED] * len(self.var_types)
+        return machine
+
     def load_postfix_file(self, filename):
         try:
             self.filename = f"{filename}.postfix"
             with open(self.filename, 'r') as self.file:
                 self.parse_postfix_program()
         except PSMException as e:
-            print(f"Error at line {self.line_number}: {self.error_messages.get(e.msg, 'Unknown error')}")
+            self.error = f"Error at line {self.line_number}: {self.error_messages.get(e.msg, 'Unknown error')}"
+            print(self.error)
+        except FileNotFoundError:
+            self.error = f"File {self.filename} not found."
+            print(self.error)
+
+    def load_binary_file(self, filename):
+        try:
+            self.filename = f"{filename}.psmb"
+            with open(self.filename, 'rb') as f:
+                variables, labels, constants, postfix_code, debug_lines = decode_binary(f.read())
+        except BinaryFormatError as e:
+            self.error = f"Error in {self.filename}: {e}"
+            print(self.error)
+            return
         except FileNotFoundError:
-            print(f"File {self.filename} not found.")
+            self.error = f"File {self.filename} not found."
+            print(self.error)
+            return
+        for section, entries in (("VarDecl", variables), ("LblDecl", labels), ("ConstDecl", constants)):
+            for key, value in entries:
+                self._add_entry(section, key, value)
+        self.postfix_code = postfix_code
+        if debug_lines is not None:
+            self.debug_map = dict(enumerate(debug_lines))
+        self.decode()
 
     def parse_postfix_program(self):
         self._parse_header(".target: PSM")
@@ -79,6 +307,7 @@ class PostfixStackMachine:
         self._parse_section("LblDecl")
         self._parse_section("ConstDecl")
         self._parse_section("Code")
+        self.decode()
 
     def _parse_header(self, expected_header):
         line = self.file.readline().strip()
@@ -112,13 +341,18 @@ class PostfixStackMachine:
         tokens = self.current_line.split()
         if len(tokens) != 2:
             raise PSMException(4)
-        key, value = tokens
+        self._add_entry(section, *tokens)
+
+    def _add_entry(self, section, key, value):
         if section == "VarDecl":
             index = len(self.table_of_id) + 1
             if value == 'bool':
                 value = 'boolval'
-            self.table_of_id[key] = (index, value, 'val_undef')
-            print(self.table_of_id[key])
+            self.table_of_id[key] = (index, value)
+            self.values.append(UNDEFINED)
+            self.var_types.append(value)
+            if self.verbosity >= TRACE_LOAD:
+                self.trace(str((index, value, UNDEFINED)))
         elif section == "LblDecl":
             self.table_of_label[key] = int(value)
         elif section == "ConstDecl":
@@ -130,42 +364,234 @@ class PostfixStackMachine:
             instruction_number = len(self.postfix_code) - 1
             self.debug_map[instruction_number] = self.line_number
 
-    def execute_postfix(self):
-        self.max_instructions = len(self.postfix_code)
-        try:
-            while self.instruction_pointer < self.max_instructions:
-                lex, tok = self.postfix_code[self.instruction_pointer]
-                if tok in ('intnum', 'floatnum', 'l-val', 'r-val', 'label', 'boolval'):
-                    self.stack.append((lex, tok))
-                    self.instruction_pointer += 1
-                elif tok in ('jump', 'jf', 'colon'):
-                    self._handle_jumps(tok)
-                elif tok == 'out':
-                    lex, tok = self.stack.pop()
-                    self.instruction_pointer += 1
-                    if tok == 'r-val':
-                        value = self.table_of_id.get(lex, ('', '', 'Undefined'))[2]
-                    else:
-                        value = lex
-                    print(f'Output: {value}')
-                elif tok == 'in':
-                    lex, tok = self.stack.pop()
-                    self.instruction_pointer += 1
-                    expected_type = self.table_of_id.get(lex, ('', ''))[1]
-                    if not expected_type:
-                        raise PSMException(8)
-                    value = self._type_safe_scan(expected_type)
-                    self.table_of_id[lex] = (self.table_of_id[lex][0], expected_type, value)
+    def decode(self):
+        # Label tokens are not executed: a label+JMP/JF pair becomes one jump whose operand is
+        # the index of its target in self.code, and label definitions are dropped.
+        # code_origin maps every decoded instruction back to its index in postfix_code.
+        self.code = []
+        self.code_origin = []
+        self.opcode_names = OPCODE_NAMES
+        positions = []  # index in self.code of the first instruction at or after every token
+        for lex, tok in self.postfix_code:
+            positions.append(len(self.code_origin))
+            if tok != 'label':
+                self.code_origin.append(len(positions) - 1)
+        positions.append(len(self.code_origin))
+        for number in self.code_origin:
+            lex, tok = self.postfix_code[number]
+            if tok in ('intnum', 'floatnum', 'boolval'):
+                self.code.append((OP_PUSH, get_value(lex, tok)))
+            elif tok in ('l-val', 'r-val') and lex not in self.table_of_id:
+                self.code.append((OP_UNDECLARED, lex))
+            elif tok == 'r-val' and not self._is_followed_by(number, 'in'):
+                self.code.append((OP_LOAD, self.slot_of(lex)))
+            elif tok in ('l-val', 'r-val'):
+                self.code.append((OP_PUSH, Address(self.slot_of(lex), lex)))
+            elif tok in ('jump', 'jf'):
+                target = self._jump_target(number)
+                if target is None or not 0 <= target < len(positions):
+                    self.code.append((OP_BAD_JUMP, lex))
                 else:
-                    self._execute_operation(lex, tok)
-                    self.instruction_pointer += 1
+                    self.code.append((TOKEN_OPCODES[tok], positions[target]))
+            elif tok in TOKEN_OPCODES:
+                self.code.append((TOKEN_OPCODES[tok], None))
+            elif (lex, tok) in OPERATOR_OPCODES:
+                self.code.append(OPERATOR_OPCODES[(lex, tok)])
+            else:
+                self.code.append((OP_INVALID, lex))
+        # Superinstructions would hide the operations that the execution trace reports
+        if self.optimize >= OPT_SUPERINSTRUCTIONS and self.verbosity < TRACE_EXECUTION:
+            self._fuse_superinstructions()
+
+    def _fuse_superinstructions(self):
+        # x = x + c and x = x - c become OP_INCREMENT, z = x + y and z = x - y become
+        # OP_LOAD_ADD_STORE and x <rel> c followed by JF becomes OP_COMPARE_JF. No pattern
+        # spans a jump target, so every jump still lands on an instruction boundary.
+        code = self.code
+        targets = {operand for opcode, operand in code if opcode in (OP_JUMP, OP_JF)}
+        fused = []
+        origin = []
+        positions = []
+        ip = 0
+        while ip < len(code):
+            instruction, length = self._match_superinstruction(code, ip, targets)
+            positions.extend([len(fused)] * length)
+            fused.append(instruction)
+            origin.append(self.code_origin[ip])
+            ip += length
+        positions.append(len(fused))
+        for number, (opcode, operand) in enumerate(fused):
+            if opcode in (OP_JUMP, OP_JF):
+                fused[number] = (opcode, positions[operand])
+            elif opcode == OP_COMPARE_JF:
+                fused[number] = (opcode, operand[:3] + (positions[operand[3]],))
+        self.code = fused
+        self.code_origin = origin
+
+    def _match_superinstruction(self, code, ip, targets):
+        end = ip + 1
+        while end < min(ip + 5, len(code)) and end not in targets:
+            end += 1
+        window = code[ip:end]
+        opcodes = tuple(opcode for opcode, _ in window)
+        if opcodes[:4] == (OP_LOAD, OP_PUSH, OP_RELATIONAL, OP_JF) and is_constant(window[1][1]):
+            (_, slot), (_, constant), (_, function), (_, target) = window[:4]
+            return (OP_COMPARE_JF, (slot, constant, function, target)), 4
+        if opcodes == (OP_PUSH, OP_LOAD, OP_PUSH, OP_ARITHMETIC, OP_ASSIGN) \
+                and window[3][1] in (operator.add, operator.sub) and window[0][1].__class__ is Address:
+            (_, address), (_, slot), (_, constant), (_, function), _ = window
+            if address.slot == slot and is_constant(constant):
+                return (OP_INCREMENT, (slot, function, constant)), 5
+        if opcodes == (OP_PUSH, OP_LOAD, OP_LOAD, OP_ARITHMETIC, OP_ASSIGN) \
+                and window[3][1] in (operator.add, operator.sub) and window[0][1].__class__ is Address:
+            (_, address), (_, left), (_, right), (_, function), _ = window
+            return (OP_LOAD_ADD_STORE, (address.slot, left, right, function)), 5
+        return code[ip], 1
+
+    def _jump_target(self, number):
+        if number == 0 or self.postfix_code[number - 1][1] != 'label':
+            return None
+        return self.table_of_label.get(self.postfix_code[number - 1][0])
+
+    def slot_of(self, name):
+        return self.table_of_id[name][0] - 1
+
+    def variables(self):
+        return {name: (index, self.var_types[index - 1], self.values[index - 1])
+                for name, (index, _) in self.table_of_id.items()}
+
+    def _is_followed_by(self, number, tok):
+        return number + 1 < len(self.postfix_code) and self.postfix_code[number + 1][1] == tok
+
+    def execute_postfix(self, engine='interpreter'):
+        try:
+            self._execute(engine)
         except PSMException as e:
-            print(f'Runtime Error: {self.error_messages.get(e.msg, "Unknown error")}')
+            self.error = f'Runtime Error: {self.error_messages.get(e.msg, "Unknown error")}'
+            print(self.error)
         except IndexError:
-            print('Runtime Error: Stack underflow')
+            self.error = 'Runtime Error: Stack underflow'
+            print(self.error)
+
+    def _execute(self, engine):
+        try:
+            if engine == 'compiled' and self.profile is None:
+                self._execute_compiled()
+            elif engine == 'compiled':
+                self._execute_interpreted()
+            elif engine == 'interpreter':
+                self._execute_interpreted()
+            else:
+                raise ValueError(f'Unknown engine {engine}')
+        finally:
+            self.output.flush()
+
+    def _execute_interpreted(self):
+        if not self.code:
+            self.decode()
+        self._dispatch(self.handlers)
+
+    def _dispatch(self, handlers):
+        code = self.code
+        ip = self.instruction_pointer
+        self.max_instructions = len(code)
+        try:
+            if self.verbosity >= TRACE_EXECUTION:
+                while ip < self.max_instructions:
+                    opcode, operand = code[ip]
+                    self._trace_instruction(opcode, ip)
+                    ip = handlers[opcode](operand, ip)
+            elif self.profile is not None:
+                counts, times = self.profile.prepare(len(code))
+                clock = time.perf_counter
+                while ip < self.max_instructions:
+                    opcode, operand = code[ip]
+                    start = clock()
+                    next_ip = handlers[opcode](operand, ip)
+                    times[ip] += clock() - start
+                    counts[ip] += 1
+                    ip = next_ip
+            else:
+                while ip < self.max_instructions:
+                    opcode, operand = code[ip]
+                    ip = handlers[opcode](operand, ip)
+        finally:
+            self.instruction_pointer = ip
+
+    def _trace_instruction(self, opcode, ip):
+        if opcode in (OP_PUSH, OP_LOAD):
+            return
+        self.trace('Executing operation: {} {}'.format(*self.postfix_code[self.code_origin[ip]]))
+        if opcode == OP_NEG and self.stack:
+            self.trace(f'Operand: {describe_operand(self.stack[-1])}')
+        elif opcode in (OP_ASSIGN, OP_ARITHMETIC, OP_DIV, OP_RELATIONAL) and len(self.stack) >= 2:
+            left, right = self.stack[-2:]
+            self.trace(f'Left operand: {describe_operand(left)}, Right operand: {describe_operand(right)}')
+
+    def _execute_compiled(self):
+        if self.compiled_program is None:
+            try:
+                compiler = PostfixCompiler(self)
+                self.compiled_program = compiler.compile()
+                if self.verbosity >= TRACE_EXECUTION:
+                    self.trace(compiler.source)
+            except PostfixCompileError:
+                self._execute_interpreted()
+                return
+        try:
+            self.compiled_program(self.values, self._output, self._type_safe_scan)
+        except ZeroDivisionError:
+            raise PSMException(10)
+        except OverflowError:
+            raise PSMException(13)
+        except UnboundLocalError:
+            raise PSMException(8)
+        finally:
+            self.instruction_pointer = len(self.code)
+
+    def _op_push(self, operand, ip):
+        self.stack.append(operand)
+        return ip + 1
+
+    def _op_load(self, slot, ip):
+        value = self.values[slot]
+        if value is UNDEFINED:
+            raise PSMException(8)
+        self.stack.append(value)
+        return ip + 1
+
+    def _op_nop(self, operand, ip):
+        return ip + 1
+
+    def _op_jump(self, target, ip):
+        return target
+
+    def _op_jf(self, target, ip):
+        if not self.stack.pop():
+            return target
+        return ip + 1
+
+    def _op_out(self, operand, ip):
+        self._output(self.stack.pop())
+        return ip + 1
+
+    def _output(self, value):
+        self.output.write(f'Output: {format_value(value)}')
+
+    def _op_in(self, operand, ip):
+        slot = self.stack.pop().slot
+        self.values[slot] = self._type_safe_scan(self.var_types[slot])
+        return ip + 1
 
     def _type_safe_scan(self, expected_type):
-        user_input = input(f"Enter a {expected_type} value: ")
+        if self.input.interactive:
+            self.output.flush()
+        try:
+            user_input = self.input.read(expected_type)
+        except EOFError:
+            raise PSMException(11)
+        if user_input.__class__ is not str:
+            return checked_input(expected_type, user_input)
         try:
             if expected_type == 'intnum':
                 return int(user_input)
@@ -177,110 +603,100 @@ class PostfixStackMachine:
         except ValueError:
             raise PSMException(9)
 
-    def _handle_jumps(self, tok):
-        if tok == 'jump':
-            label, _ = self.stack.pop()
-            self.instruction_pointer = self.table_of_label.get(label, self.instruction_pointer)
-        elif tok == 'jf':
-            label, _ = self.stack.pop()
-            condition, _ = self.stack.pop()
-            if condition.lower() == 'false':
-                self.instruction_pointer = self.table_of_label.get(label, self.instruction_pointer)
-            else:
-                self.instruction_pointer += 1
-
-    def _execute_operation(self, lex, tok):
-        print(f'Executing operation: {lex} {tok}')
-        if tok == 'unary_op':
-            operand_lex, operand_tok = self.stack.pop()
-            print(f'Operand: {operand_lex}')
-            operand_value = get_value(operand_lex, operand_tok)
-            if lex == '-' and operand_tok in ('intnum', 'floatnum'):
-                result = -operand_value
-                result_type = operand_tok
-            else:
-                raise PSMException(9)
-            self.stack.append((str(result), result_type))
-
-        else:
-            right_lex, right_tok = self.stack.pop()
-            left_lex, left_tok = self.stack.pop()
-            print(f'Left operand: {left_lex}, Right operand: {right_lex}')
-            if (lex, tok) == ('=', 'assign_op'):
-                var_type = self.table_of_id[left_lex][1]
-                if var_type != right_tok and not (var_type == 'floatnum' and right_tok == 'intnum'):
-                    raise PSMException(7)
-                self.table_of_id[left_lex] = (self.table_of_id[left_lex][0], right_tok, get_value(right_lex, right_tok))
-            else:
-                self._process_arithmetic_or_boolean_op(
-                    (left_lex, left_tok),
-                    lex,
-                    (right_lex, right_tok)
-                )
-
-    def _process_arithmetic_or_boolean_op(self, left, operator, right):
-        left_type, left_value = self._get_operand_value(*left)
-        right_type, right_value = self._get_operand_value(*right)
-        self._apply_operator(
-            (left[0], left_type, left_value),
-            operator,
-            (right[0], right_type, right_value)
-        )
-
-    def _get_operand_value(self, lex, tok):
-        if tok == 'r-val':
-            _, var_type, value = self.table_of_id.get(lex, (None, None, 'val_undef'))
-            if value == 'val_undef':
-                raise PSMException(8)
-            return var_type, value
-        elif tok == 'l-val':
-            return self.table_of_id[lex][1], self.table_of_id[lex][2]
-        else:
-            return tok, get_value(lex, tok)
-
-    def _apply_operator(self, left, operator, right):
-        _, left_type, left_value = left
-        _, right_type, right_value = right
-        if left_type != right_type:
-            raise PSMException(9)
-        result_type = left_type
+    def _op_neg(self, operand, ip):
+        self.stack.append(checked_negate(self.stack.pop()))
+        return ip + 1
 
+    def _op_assign(self, operand, ip):
+        address, value = self._pop_operands()
+        self.values[address.slot] = checked_assign(self.var_types[address.slot], value)
+        return ip + 1
+
+    def _op_arithmetic(self, function, ip):
+        left, right = self._binary_operands()
         try:
-            if operator == '+':
-                result = left_value + right_value
-            elif operator == '-':
-                result = left_value - right_value
-            elif operator == '*':
-                result = left_value * right_value
-            elif operator == '**':
-                result = left_value ** right_value
-            elif operator == '%':
-                if right_value == 0:
-                    raise PSMException(10)
-                result = left_value % right_value
-            elif operator == '/':
-                if right_value == 0:
-                    raise PSMException(10)
-                if result_type == 'floatnum':
-                    result = left_value / right_value
-                else:
-                    result = f2i(left_value / right_value)
-            elif operator in ('<', '<=', '>', '>=', '==', '!='):
-                result = str(eval(f'{left_value} {operator} {right_value}')).lower()
-                result_type = 'boolval'
-            else:
-                raise PSMException(f'Unknown operator {operator}')
+            self.stack.append(function(left, right))
         except ZeroDivisionError:
             raise PSMException(10)
+        except OverflowError:
+            raise PSMException(13)
+        return ip + 1
+
+    def _op_div(self, operand, ip):
+        left, right = self._binary_operands()
+        if right == 0:
+            raise PSMException(10)
+        try:
+            if left.__class__ is float:
+                self.stack.append(left / right)
+            else:
+                self.stack.append(f2i(left / right))
+        except OverflowError:
+            raise PSMException(13)
+        return ip + 1
+
+    def _op_relational(self, function, ip):
+        left, right = self._pop_operands()
+        if (left.__class__, right.__class__) not in COMPARABLE_TYPES:
+            raise PSMException(9)
+        self.stack.append(function(left, right))
+        return ip + 1
+
+    def _op_increment(self, operand, ip):
+        slot, function, constant = operand
+        value = self.values[slot]
+        if value is UNDEFINED:
+            raise PSMException(8)
+        check_operand_types(value, constant)
+        self.values[slot] = checked_assign(self.var_types[slot], function(value, constant))
+        return ip + 1
+
+    def _op_load_add_store(self, operand, ip):
+        target, left_slot, right_slot, function = operand
+        left = self.values[left_slot]
+        right = self.values[right_slot]
+        if left is UNDEFINED or right is UNDEFINED:
+            raise PSMException(8)
+        check_operand_types(left, right)
+        self.values[target] = checked_assign(self.var_types[target], function(left, right))
+        return ip + 1
+
+    def _op_compare_jf(self, operand, ip):
+        slot, constant, function, target = operand
+        value = self.values[slot]
+        if value is UNDEFINED:
+            raise PSMException(8)
+        if (value.__class__, constant.__class__) not in COMPARABLE_TYPES:
+            raise PSMException(9)
+        if not function(value, constant):
+            return target
+        return ip + 1
+
+    def _op_undeclared(self, name, ip):
+        raise PSMException(8)
 
-        self.stack.append((str(result), result_type))
+    def _op_bad_jump(self, operand, ip):
+        raise PSMException(12)
+
+    def _op_invalid(self, operator, ip):
+        raise PSMException(f'Unknown operator {operator}')
+
+    def _pop_operands(self):
+        right = self.stack.pop()
+        left = self.stack.pop()
+        return left, right
+
+    def _binary_operands(self):
+        left, right = self._pop_operands()
+        check_operand_types(left, right)
+        return left, right
 
     from tabulate import tabulate
 
     def display_tables(self):
         if self.table_of_id:
             print("\nIdentifier Table:")
-            id_table = [[key] + list(value) for key, value in self.table_of_id.items()]
+            id_table = [[key] + list(value) for key, value in self.variables().items()]
             print(tabulate(id_table, headers=["Identifier", "Index", "Type", "Value"], tablefmt="plain"))
 
         if self.table_of_label:
@@ -303,6 +719,247 @@ class PostfixStackMachine:
             debug_table = [[instr_num, line_num] for instr_num, line_num in self.debug_map.items()]
             print(tabulate(debug_table, headers=["#", "Line #"], tablefmt="plain2"))
 
+        if self.profile is not None and self.profile.counts:
+            self.display_profile()
+
+    def display_profile(self, top=10):
+        print("\nProfile:")
+        print(self.profile.report(self, top))
+
+    def export_profile(self, filename, top=None):
+        self.profile.export(self, filename, top)
+
+
+Operand = namedtuple('Operand', 'expression type reads name')
+
+
+class PostfixCompiler:
+    """
+    Translates loaded postfix code into a Python function. Variables become locals
+    named v<slot>, so names read from a file never reach the generated source. The
+    operand stack is resolved into expressions at translation time, and the code is
+    split into basic blocks driven by a block dispatcher. A header block ending in JF
+    whose body block jumps straight back to it is emitted as a native while loop.
+    """
+
+    def __init__(self, machine):
+        self.machine = machine
+        self.postfix_code = machine.postfix_code
+        self.var_types = {name: machine.var_types[index - 1] for name, (index, _) in machine.table_of_id.items()}
+        self.temp_count = 0
+        self.constants = {}
+        self.source = ''
+
+    def _local(self, name):
+        return f'v{self.machine.slot_of(name)}'
+
+    def _literal(self, lex, tok):
+        value = get_value(lex, tok)
+        if value.__class__ is float and not math.isfinite(value):
+            # inf and nan have no Python literal; they are bound in the namespace of the program
+            name = f'_c{len(self.constants)}'
+            self.constants[name] = value
+            return name
+        return repr(value)
+
+    def compile(self):
+        blocks = self._split_blocks()
+        lines = ['def program(_values, _output, _scan):']
+        for name in self.var_types:
+            lines.append(f'    if _values[{self.machine.slot_of(name)}] is not _undefined:')
+            lines.append(f'        {self._local(name)} = _values[{self.machine.slot_of(name)}]')
+        lines.append('    try:')
+        lines.append('        block = 0')
+        lines.append('        while True:')
+        keyword = 'if'
+        skipped = set()
+        for number, block in enumerate(blocks):
+            if number in skipped:
+                continue
+            lines.append(f'            {keyword} block == {number}:')
+            keyword = 'elif'
+            statements, exit = self._translate(*block)
+            loop_body = self._simple_loop_body(blocks, number, exit)
+            if loop_body is not None:
+                skipped.add(number + 1)
+                lines.append('                while True:')
+                lines.extend('                    ' + line for line in statements)
+                lines.append(f'                    if not {exit[1]}:')
+                lines.append('                        break')
+                lines.extend('                    ' + line for line in loop_body)
+                exit = ('goto', exit[2])
+            else:
+                lines.extend('                ' + line for line in statements)
+            lines.extend('                ' + line for line in self._exit_lines(exit))
+        lines.append(f'            {keyword} block == {len(blocks)}:' if blocks else '            if True:')
+        lines.append('                break')
+        lines.append('    finally:')
+        lines.append('        _locals = locals()')
+        for name in self.var_types:
+            lines.append(f'        if {self._local(name)!r} in _locals:')
+            lines.append(f'            _values[{self.machine.slot_of(name)}] = _locals[{self._local(name)!r}]')
+        self.source = '\n'.join(lines) + '\n'
+
+        namespace = {
+            'PSMException': PSMException,
+            '_undefined': UNDEFINED,
+            '_arithmetic': checked_arithmetic,
+            '_divide': checked_divide,
+            '_compare': checked_compare,
+            '_negate': checked_negate,
+            '_assign': checked_assign,
+            **self.constants
+        }
+        exec(compile(self.source, f'<{self.machine.filename or "postfix"}>', 'exec'), namespace)
+        return namespace['program']
+
+    def _split_blocks(self):
+        self.jumps = {}
+        leaders = {0}
+        for number, (lex, tok) in enumerate(self.postfix_code):
+            if tok in ('jump', 'jf'):
+                if number == 0 or self.postfix_code[number - 1][1] != 'label':
+                    raise PostfixCompileError(number)
+                label = self.postfix_code[number - 1][0]
+                if label not in self.machine.table_of_label:
+                    raise PostfixCompileError(number)
+                target = self.machine.table_of_label[label]
+                if not 0 <= target <= len(self.postfix_code):
+                    raise PostfixCompileError(number)
+                self.jumps[number] = target
+                leaders.add(target)
+                leaders.add(number + 1)
+        leaders = sorted(leader for leader in leaders if leader <= len(self.postfix_code))
+        if leaders[-1] != len(self.postfix_code):
+            leaders.append(len(self.postfix_code))
+        self.block_of = {start: number for number, start in enumerate(leaders)}
+        return list(zip(leaders, leaders[1:]))
+
+    def _simple_loop_body(self, blocks, number, exit):
+        if exit[0] != 'branch' or exit[3] != number + 1 or exit[2] != number + 2:
+            return None
+        if number + 1 in (self.block_of[target] for target in self.jumps.values()):
+            return None
+        body, body_exit = self._translate(*blocks[number + 1])
+        if body_exit != ('goto', number):
+            return None
+        return body
+
+    def _exit_lines(self, exit):
+        if exit[0] == 'goto':
+            return [f'block = {exit[1]}', 'continue']
+        if exit[0] == 'branch':
+            return [f'if not {exit[1]}:', f'    block = {exit[2]}', '    continue', f'block = {exit[3]}', 'continue']
+        return ['break']
+
+    def _translate(self, start, end):
+        statements = []
+        stack = []
+        next_block = self.block_of.get(end, len(self.block_of))
+        for number in range(start, end):
+            lex, tok = self.postfix_code[number]
+            if tok in ('intnum', 'floatnum', 'boolval'):
+                stack.append(Operand(self._literal(lex, tok), tok, frozenset(), None))
+            elif tok == 'r-val' and not self.machine._is_followed_by(number, 'in'):
+                if lex not in self.var_types:
+                    raise PostfixCompileError(number)
+                stack.append(Operand(self._local(lex), self.var_types[lex], frozenset((lex,)), None))
+            elif tok in ('l-val', 'r-val'):
+                stack.append(Operand(repr(lex), 'address', frozenset(), lex))
+            elif tok == 'label':
+                if number + 1 in self.jumps:
+                    stack.append(Operand(repr(lex), 'label', frozenset(), lex))
+            elif tok == 'jump':
+                self._pop(stack, number)
+                return statements, ('goto', self.block_of[self.jumps[number]])
+            elif tok == 'jf':
+                self._pop(stack, number)
+                condition = self._pop(stack, number)
+                return statements, ('branch', f'({condition.expression})', self.block_of[self.jumps[number]],
+                                    next_block)
+            elif tok == 'colon':
+                continue
+            elif tok == 'out':
+                statements.append(f'_output({self._pop(stack, number).expression})')
+            elif tok == 'in':
+                name = self._pop(stack, number).name
+                if name not in self.var_types:
+                    raise PostfixCompileError(number)
+                self._materialize(stack, statements, name)
+                statements.append(f'{self._local(name)} = _scan({self.var_types[name]!r})')
+            elif (lex, tok) == ('=', 'assign_op'):
+                value = self._pop(stack, number)
+                name = self._pop(stack, number).name
+                if name not in self.var_types:
+                    raise PostfixCompileError(number)
+                self._materialize(stack, statements, name)
+                statements.append(self._assignment(name, value))
+            elif (lex, tok) == ('-', 'unary_op'):
+                value = self._pop(stack, number)
+                if value.type in ('intnum', 'floatnum'):
+                    stack.append(Operand(f'(-{value.expression})', value.type, value.reads, None))
+                elif value.type is None:
+                    stack.append(Operand(f'_negate({value.expression})', None, value.reads, None))
+                else:
+                    statements.append('raise PSMException(9)')
+                    return statements, ('end',)
+            elif (lex, tok) in OPERATOR_OPCODES:
+                right = self._pop(stack, number)
+                left = self._pop(stack, number)
+                expression = self._binary_expression(lex, left, right)
+                if expression is None:
+                    statements.append('raise PSMException(9)')
+                    return statements, ('end',)
+                stack.append(expression)
+            else:
+                statements.append(f'raise PSMException({"Unknown operator " + lex!r})')
+                return statements, ('end',)
+        return statements, ('goto', next_block)
+
+    def _pop(self, stack, number):
+        if not stack:
+            raise PostfixCompileError(number)
+        return stack.pop()
+
+    def _materialize(self, stack, statements, name):
+        for position, operand in enumerate(stack):
+            if name in operand.reads:
+                temp = f't_{self.temp_count}'
+                self.temp_count += 1
+                statements.append(f'{temp} = {operand.expression}')
+                stack[position] = Operand(temp, operand.type, frozenset(), None)
+
+    def _assignment(self, name, value):
+        var_type = self.var_types[name]
+        if value.type is None or var_type not in STATIC_TYPES:
+            return f'{self._local(name)} = _assign({var_type!r}, {value.expression})'
+        if value.type == var_type:
+            return f'{self._local(name)} = {value.expression}'
+        if var_type == 'floatnum' and value.type == 'intnum':
+            return f'{self._local(name)} = float({value.expression})'
+        return 'raise PSMException(7)'
+
+    def _binary_expression(self, operator_lexeme, left, right):
+        reads = left.reads | right.reads
+        operands = f'{left.expression}, {right.expression}'
+        if operator_lexeme in RELATIONAL_OPERATORS:
+            if left.type is None or right.type is None:
+                return Operand(f'_compare({operator_lexeme!r}, {operands})', 'boolval', reads, None)
+            if (STATIC_TYPES.get(left.type), STATIC_TYPES.get(right.type)) not in COMPARABLE_TYPES:
+                return None
+            return Operand(f'({left.expression} {operator_lexeme} {right.expression})', 'boolval', reads, None)
+        if left.type is None or right.type is None or left.type == right.type == 'boolval':
+            if operator_lexeme == '/':
+                return Operand(f'_divide({operands})', None, reads, None)
+            return Operand(f'_arithmetic({operator_lexeme!r}, {operands})', None, reads, None)
+        if left.type != right.type or left.type not in STATIC_TYPES:
+            return None
+        if operator_lexeme == '/' and left.type == 'intnum':
+            return Operand(f'int({left.expression} / {right.expression})', 'intnum', reads, None)
+        if operator_lexeme == '**' and left.type == 'intnum':
+            return Operand(f'({left.expression} ** {right.expression})', None, reads, None)
+        return Operand(f'({left.expression} {operator_lexeme} {right.expression})', left.type, reads, None)
+
 
 if __name__ == '__main__':
     psm = PostfixStackMachine()
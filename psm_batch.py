@@ -0,0 +1,50 @@
+import contextlib
+import io
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from psm import PostfixStackMachine, PSMException
+
+RunResult = namedtuple('RunResult', 'outputs error')
+
+_template = None
+_engine = 'interpreter'
+
+
+def run_batch(filename, input_sets, engine='interpreter', max_workers=None):
+    """
+    Loads and decodes the postfix program once and executes it for every input set on a
+    process pool. Each run gets its own variables, stack and input source. Returns a list
+    of RunResult(outputs, error) in the order of input_sets; an exception that escapes a
+    run is stored in its error instead of stopping the batch.
+    """
+    template = PostfixStackMachine()
+    with contextlib.redirect_stdout(io.StringIO()):
+        template.load_postfix_file(filename)
+    if template.error is not None:
+        raise PSMException(template.error)
+    input_sets = list(input_sets)
+    with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(template, engine)) as pool:
+        chunksize = max(1, len(input_sets) // ((max_workers or os.cpu_count() or 1) * 4))
+        return list(pool.map(_run, input_sets, chunksize=chunksize))
+
+
+def _init_worker(template, engine):
+    global _template, _engine
+    _template = template
+    _engine = engine
+
+
+def _run(input_source):
+    outputs = []
+    machine = _template.fork(input_source=input_source, output=outputs)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            machine.execute_postfix(engine=_engine)
+    except Exception as e:
+        # A failure the machine does not report must not cost the other runs their results
+        return RunResult(outputs, f'Runtime Error: {e.__class__.__name__}: {e}')
+    if _template.compiled_program is None:
+        _template.compiled_program = machine.compiled_program
+    return RunResult(outputs, machine.error)
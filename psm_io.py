@@ -0,0 +1,100 @@
+import io
+import os
+import sys
+
+
+class BufferedOutput:
+    """
+    Collects lines produced by the PSM 'out' instruction and writes them to the target writer
+    in batches. The writer can be None (the current sys.stdout), a list (lines are appended
+    without a trailing newline), a callable (called with each line), a text file or a binary
+    stream such as io.BufferedWriter.
+    """
+
+    def __init__(self, writer=None, buffer_size=8192):
+        self.writer = writer
+        self.buffer_size = buffer_size
+        self.pending = []
+        self.pending_size = 0
+
+    def write(self, line):
+        if self.writer.__class__ is list:
+            self.writer.append(line)
+            return
+        self.pending.append(line)
+        self.pending_size += len(line) + 1
+        if self.pending_size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        if callable(self.writer):
+            lines = self.pending
+            self.pending = []
+            self.pending_size = 0
+            for line in lines:
+                self.writer(line)
+            return
+        text = '\n'.join(self.pending) + '\n'
+        self.pending = []
+        self.pending_size = 0
+        writer = sys.stdout if self.writer is None else self.writer
+        if isinstance(writer, (io.RawIOBase, io.BufferedIOBase)):
+            writer.write(text.encode())
+        else:
+            writer.write(text)
+        if hasattr(writer, 'flush'):
+            writer.flush()
+
+
+class InteractiveInput:
+    """
+    Prompts the user for every value read by the PSM 'in' instruction.
+    """
+    interactive = True
+
+    def read(self, expected_type):
+        return input(f"Enter a {expected_type} value: ")
+
+
+class IterableInput:
+    """
+    Takes input values from a list, tuple or generator. The values can be strings or
+    already converted ints, floats and bools.
+    """
+    interactive = False
+
+    def __init__(self, values):
+        self.values = iter(values)
+
+    def read(self, expected_type):
+        try:
+            return next(self.values)
+        except StopIteration:
+            raise EOFError
+
+
+class StreamInput(IterableInput):
+    """
+    Reads a whole text stream (a file, sys.stdin) or the file at the given path at once
+    and splits it into whitespace separated tokens.
+    """
+
+    def __init__(self, stream):
+        if isinstance(stream, (str, os.PathLike)):
+            with open(stream, 'r') as f:
+                tokens = f.read().split()
+        else:
+            tokens = stream.read().split()
+        super().__init__(tokens)
+
+
+def make_input_source(source):
+    if source is None:
+        return InteractiveInput()
+    if hasattr(source, 'interactive'):
+        return source
+    if hasattr(source, 'read') or isinstance(source, (str, os.PathLike)):
+        return StreamInput(source)
+    return IterableInput(source)
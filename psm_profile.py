@@ -0,0 +1,93 @@
+import bisect
+import json
+from collections import defaultdict
+
+from tabulate import tabulate
+
+
+class InstructionProfile:
+    """
+    Execution counts and wall time per decoded instruction, filled in by the interpreter
+    loop of a machine created with profile=True. Runs of the same decoded program add up.
+    summary() groups the data into hot instructions, opcodes, basic blocks (one per label,
+    counted at the instruction the label leads to) and .postfix lines from debug_map; top
+    limits the instruction and line tables, None keeps every row.
+    """
+
+    def __init__(self):
+        self.counts = []
+        self.times = []
+
+    def prepare(self, size):
+        if len(self.counts) != size:
+            self.counts = [0] * size
+            self.times = [0.0] * size
+        return self.counts, self.times
+
+    def reset(self):
+        self.counts = []
+        self.times = []
+
+    def summary(self, machine, top=10):
+        total_time = sum(self.times) or 1.0
+        instructions = []
+        opcodes = defaultdict(lambda: [0, 0.0])
+        lines = defaultdict(lambda: [0, 0.0])
+        for ip, (count, seconds) in enumerate(zip(self.counts, self.times)):
+            if not count:
+                continue
+            opcode = machine.code[ip][0]
+            number = machine.code_origin[ip]
+            lex, tok = machine.postfix_code[number]
+            line = machine.debug_map.get(number)
+            instructions.append((ip, number, lex, tok, machine.opcode_names[opcode], line, count, seconds,
+                                 100 * seconds / total_time))
+            for totals in (opcodes[machine.opcode_names[opcode]], lines[line]):
+                totals[0] += count
+                totals[1] += seconds
+        instructions.sort(key=lambda row: row[7], reverse=True)
+        blocks = []
+        for label, target in machine.table_of_label.items():
+            ip = bisect.bisect_left(machine.code_origin, target)
+            if ip < len(self.counts):
+                blocks.append((label, target, self.counts[ip]))
+        blocks.sort(key=lambda row: row[2], reverse=True)
+        lines = sorted(((line, count, seconds, 100 * seconds / total_time)
+                        for line, (count, seconds) in lines.items() if line is not None),
+                       key=lambda row: row[2], reverse=True)
+        return {
+            'instructions': instructions[:top],
+            'opcodes': sorted(((name, count, seconds, 100 * seconds / total_time)
+                               for name, (count, seconds) in opcodes.items()), key=lambda row: row[2], reverse=True),
+            'blocks': blocks,
+            'lines': lines[:top]
+        }
+
+    def report(self, machine, top=10):
+        summary = self.summary(machine, top)
+        parts = [
+            "Hot Instructions:",
+            tabulate(summary['instructions'], headers=["IP", "#", "Lexeme", "Token", "Opcode", "Line #", "Count",
+                                                       "Time (s)", "%"], tablefmt="plain", floatfmt=".6f"),
+            "\nOpcodes:",
+            tabulate(summary['opcodes'], headers=["Opcode", "Count", "Time (s)", "%"], tablefmt="plain",
+                     floatfmt=".6f")
+        ]
+        if summary['blocks']:
+            parts += ["\nBasic Blocks:", tabulate(summary['blocks'], headers=["Label", "#", "Count"], tablefmt="plain")]
+        if summary['lines']:
+            parts += ["\nLines:", tabulate(summary['lines'], headers=["Line #", "Count", "Time (s)", "%"],
+                                           tablefmt="plain", floatfmt=".6f")]
+        return '\n'.join(parts)
+
+    def export(self, machine, filename, top=None):
+        summary = self.summary(machine, top)
+        columns = {
+            'instructions': ('ip', 'instruction', 'lexeme', 'token', 'opcode', 'line', 'count', 'seconds', 'percent'),
+            'opcodes': ('opcode', 'count', 'seconds', 'percent'),
+            'blocks': ('label', 'instruction', 'count'),
+            'lines': ('line', 'count', 'seconds', 'percent')
+        }
+        data = {section: [dict(zip(columns[section], row)) for row in rows] for section, rows in summary.items()}
+        with open(filename, 'w') as f:
+            json.dump(data, f, indent=2)
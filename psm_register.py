@@ -0,0 +1,340 @@
+from psm import PostfixStackMachine, PSMException, Address, UNDEFINED, OPERATOR_OPCODES, \
+    OP_ARITHMETIC, OP_DIV, OP_RELATIONAL, COMPARABLE_TYPES, STATIC_TYPES, VALUE_TYPES, get_value, f2i, \
+    format_value, checked_assign, checked_negate
+
+R_MOVE, R_ARITHMETIC, R_DIV, R_RELATIONAL, R_NEG, R_JUMP, R_JF, R_COMPARE_JF, R_OUT, R_IN, R_RAISE = range(11)
+
+REGISTER_OPCODE_NAMES = ('move', 'arithmetic', 'div', 'relational', 'neg', 'jump', 'jf', 'compare_jf', 'out', 'in',
+                         'raise')
+
+# Register instructions that compute (dst, ...) and may store straight into a variable
+STORING_OPCODES = {R_ARITHMETIC, R_DIV, R_RELATIONAL, R_NEG}
+
+
+class RegisterTranslationError(Exception):
+    pass
+
+
+def check_operands(left, right):
+    # Slow path of the operand checks: the stack machine reports an unset variable when it
+    # is loaded, before the operator sees mismatched types
+    if left is UNDEFINED or right is UNDEFINED:
+        raise PSMException(8)
+    raise PSMException(9)
+
+
+class RegisterMachine(PostfixStackMachine):
+    """
+    Executes the same .postfix and .psmb programs as PostfixStackMachine, translated at
+    load time into three-address register code. The register file holds the variable
+    slots, then the constants, then one temporary per operand stack depth, so operands
+    are read where they live instead of being pushed and popped. An assignment whose
+    value is computed by the instruction before it stores into the variable directly,
+    and a comparison followed by JF becomes one compare-and-branch. Errors and the
+    out/in behaviour are those of the stack machine. Code whose operand stack does not
+    translate (values left on the stack across a jump, an address used as a value) is
+    run by the stack machine instead.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.constant_values = None  # None while the stack machine code is in use
+        self.temp_count = 0
+        self.registers = []
+
+    def fork(self, input_source=None, output=None):
+        machine = super().fork(input_source, output)
+        machine.constant_values = self.constant_values
+        machine.temp_count = self.temp_count
+        return machine
+
+    def decode(self):
+        try:
+            self._translate()
+        except RegisterTranslationError:
+            self.constant_values = None
+            super().decode()
+
+    def _translate(self):
+        postfix_code = self.postfix_code
+        var_count = len(self.var_types)
+        constants = {}
+        for lex, tok in postfix_code:
+            if tok in ('intnum', 'floatnum', 'boolval'):
+                constants.setdefault((lex, tok), var_count + len(constants))
+        temp_base = var_count + len(constants)
+        leaders = set()
+        for number, (lex, tok) in enumerate(postfix_code):
+            if tok in ('jump', 'jf'):
+                target = self._jump_target(number)
+                if target is not None:
+                    leaders.add(target)
+
+        code = []
+        origin = []
+        positions = []
+        jumps = []
+        stack = []
+        max_depth = 0
+
+        def emit(number, instruction):
+            code.append(instruction)
+            origin.append(number)
+
+        def pop_value(number):
+            if not stack or stack[-1].__class__ is Address:
+                raise RegisterTranslationError(number)
+            return stack.pop()
+
+        def pop_address(number):
+            if not stack or stack[-1].__class__ is not Address:
+                raise RegisterTranslationError(number)
+            return stack.pop()
+
+        def push_temp():
+            nonlocal max_depth
+            register = temp_base + len(stack)
+            stack.append(register)
+            max_depth = max(max_depth, len(stack))
+            return register
+
+        def materialize(number, slot):
+            # The operand stack must keep the value a variable had before it is overwritten
+            for depth, entry in enumerate(stack):
+                if entry.__class__ is int and entry == slot:
+                    emit(number, (R_MOVE, (temp_base + depth, slot, None)))
+                    stack[depth] = temp_base + depth
+
+        for number, (lex, tok) in enumerate(postfix_code):
+            positions.append(len(code))
+            if number in leaders and stack:
+                raise RegisterTranslationError(number)
+            if tok in ('intnum', 'floatnum', 'boolval'):
+                stack.append(constants[(lex, tok)])
+                max_depth = max(max_depth, len(stack))
+            elif tok in ('l-val', 'r-val') and lex not in self.table_of_id:
+                emit(number, (R_RAISE, 8))
+                push_temp()
+            elif tok == 'r-val' and not self._is_followed_by(number, 'in'):
+                stack.append(self.slot_of(lex))
+                max_depth = max(max_depth, len(stack))
+            elif tok in ('l-val', 'r-val'):
+                stack.append(Address(self.slot_of(lex), lex))
+                max_depth = max(max_depth, len(stack))
+            elif tok in ('label', 'colon'):
+                continue
+            elif tok in ('jump', 'jf'):
+                condition = pop_value(number) if tok == 'jf' else None
+                if stack:
+                    raise RegisterTranslationError(number)
+                target = self._jump_target(number)
+                if target is None or not 0 <= target <= len(postfix_code):
+                    emit(number, (R_RAISE, 12))
+                    continue
+                jumps.append((len(code), target))
+                if tok == 'jump':
+                    emit(number, (R_JUMP, None))
+                elif condition >= temp_base and code and code[-1][0] == R_RELATIONAL and code[-1][1][0] == condition:
+                    _, function, left, right, _ = code.pop()[1]
+                    origin.pop()
+                    jumps[-1] = (len(code), target)
+                    emit(number, (R_COMPARE_JF, (function, left, right, None)))
+                else:
+                    emit(number, (R_JF, (condition, None)))
+            elif tok == 'out':
+                emit(number, (R_OUT, pop_value(number)))
+            elif tok == 'in':
+                slot = pop_address(number).slot
+                materialize(number, slot)
+                emit(number, (R_IN, slot))
+            elif (lex, tok) == ('=', 'assign_op'):
+                value = pop_value(number)
+                slot = pop_address(number).slot
+                materialize(number, slot)
+                var_type = self.var_types[slot]
+                if value >= temp_base and code and code[-1][0] in STORING_OPCODES and code[-1][1][0] == value:
+                    opcode, operand = code[-1]
+                    code[-1] = (opcode, (slot, *operand[1:-1], var_type))
+                else:
+                    emit(number, (R_MOVE, (slot, value, var_type)))
+            elif (lex, tok) == ('-', 'unary_op'):
+                operand = pop_value(number)
+                emit(number, (R_NEG, (push_temp(), operand, None)))
+            elif (lex, tok) in OPERATOR_OPCODES:
+                opcode, function = OPERATOR_OPCODES[(lex, tok)]
+                right = pop_value(number)
+                left = pop_value(number)
+                if opcode == OP_ARITHMETIC:
+                    emit(number, (R_ARITHMETIC, (push_temp(), function, left, right, None)))
+                elif opcode == OP_DIV:
+                    emit(number, (R_DIV, (push_temp(), left, right, None)))
+                elif opcode == OP_RELATIONAL:
+                    emit(number, (R_RELATIONAL, (push_temp(), function, left, right, None)))
+                else:
+                    raise RegisterTranslationError(number)
+            else:
+                emit(number, (R_RAISE, f'Unknown operator {lex}'))
+        positions.append(len(code))
+
+        for index, target in jumps:
+            opcode, operand = code[index]
+            if opcode == R_JUMP:
+                code[index] = (opcode, positions[target])
+            else:
+                code[index] = (opcode, operand[:-1] + (positions[target],))
+        self.code = code
+        self.code_origin = origin
+        self.opcode_names = REGISTER_OPCODE_NAMES
+        self.constant_values = [get_value(lex, tok) for lex, tok in constants]
+        self.temp_count = max_depth
+
+    def _execute_interpreted(self):
+        if not self.code:
+            self.decode()
+        if self.constant_values is None:
+            super()._execute_interpreted()
+            return
+        var_count = len(self.values)
+        self.registers = registers = self.values + self.constant_values + [None] * self.temp_count
+        try:
+            self._dispatch(self._build_register_handlers())
+        finally:
+            self.values[:] = registers[:var_count]
+
+    def _trace_instruction(self, opcode, ip):
+        if self.constant_values is None:
+            super()._trace_instruction(opcode, ip)
+            return
+        self.trace('Executing operation: {} {}'.format(*self.postfix_code[self.code_origin[ip]]))
+
+    def _build_register_handlers(self):
+        return [
+            self._r_move,
+            self._r_arithmetic,
+            self._r_div,
+            self._r_relational,
+            self._r_neg,
+            self._r_jump,
+            self._r_jf,
+            self._r_compare_jf,
+            self._r_out,
+            self._r_in,
+            self._r_raise
+        ]
+
+    def _r_move(self, operand, ip):
+        dst, src, var_type = operand
+        registers = self.registers
+        value = registers[src]
+        if value is UNDEFINED:
+            raise PSMException(8)
+        if var_type is not None and value.__class__ is not STATIC_TYPES.get(var_type):
+            value = checked_assign(var_type, value)
+        registers[dst] = value
+        return ip + 1
+
+    def _r_arithmetic(self, operand, ip):
+        dst, function, left, right, var_type = operand
+        registers = self.registers
+        left = registers[left]
+        right = registers[right]
+        if left.__class__ is not right.__class__ or left.__class__ not in VALUE_TYPES:
+            check_operands(left, right)
+        try:
+            value = function(left, right)
+        except ZeroDivisionError:
+            raise PSMException(10)
+        except OverflowError:
+            raise PSMException(13)
+        if var_type is not None and value.__class__ is not STATIC_TYPES.get(var_type):
+            value = checked_assign(var_type, value)
+        registers[dst] = value
+        return ip + 1
+
+    def _r_div(self, operand, ip):
+        dst, left, right, var_type = operand
+        registers = self.registers
+        left = registers[left]
+        right = registers[right]
+        if left.__class__ is not right.__class__ or left.__class__ not in VALUE_TYPES:
+            check_operands(left, right)
+        if right == 0:
+            raise PSMException(10)
+        try:
+            value = left / right if left.__class__ is float else f2i(left / right)
+        except OverflowError:
+            raise PSMException(13)
+        if var_type is not None and value.__class__ is not STATIC_TYPES.get(var_type):
+            value = checked_assign(var_type, value)
+        registers[dst] = value
+        return ip + 1
+
+    def _r_relational(self, operand, ip):
+        dst, function, left, right, var_type = operand
+        registers = self.registers
+        left = registers[left]
+        right = registers[right]
+        if (left.__class__, right.__class__) not in COMPARABLE_TYPES:
+            check_operands(left, right)
+        value = function(left, right)
+        if var_type is not None and var_type != 'boolval':
+            value = checked_assign(var_type, value)
+        registers[dst] = value
+        return ip + 1
+
+    def _r_neg(self, operand, ip):
+        dst, src, var_type = operand
+        registers = self.registers
+        value = registers[src]
+        if value is UNDEFINED:
+            raise PSMException(8)
+        value = checked_negate(value)
+        if var_type is not None and value.__class__ is not STATIC_TYPES.get(var_type):
+            value = checked_assign(var_type, value)
+        registers[dst] = value
+        return ip + 1
+
+    def _r_jump(self, target, ip):
+        return target
+
+    def _r_jf(self, operand, ip):
+        condition, target = operand
+        value = self.registers[condition]
+        if value is UNDEFINED:
+            raise PSMException(8)
+        if not value:
+            return target
+        return ip + 1
+
+    def _r_compare_jf(self, operand, ip):
+        function, left, right, target = operand
+        registers = self.registers
+        left = registers[left]
+        right = registers[right]
+        if (left.__class__, right.__class__) not in COMPARABLE_TYPES:
+            check_operands(left, right)
+        if not function(left, right):
+            return target
+        return ip + 1
+
+    def _r_out(self, src, ip):
+        value = self.registers[src]
+        if value is UNDEFINED:
+            raise PSMException(8)
+        self.output.write(f'Output: {format_value(value)}')
+        return ip + 1
+
+    def _r_in(self, slot, ip):
+        self.registers[slot] = self._type_safe_scan(self.var_types[slot])
+        return ip + 1
+
+    def _r_raise(self, error, ip):
+        raise PSMException(error)
+
+
+if __name__ == '__main__':
+    machine = RegisterMachine()
+    machine.load_postfix_file("test")
+    print('Executing postfix code:')
+    machine.execute_postfix()
+    machine.display_tables()
@@ -0,0 +1,120 @@
+# Typed syntax tree built by the parser and walked by the postfix and CIL generators.
+# Expression nodes carry their static type: 'intnum', 'floatnum' or 'bool'.
+# Statement nodes carry the source line they start on.
+
+
+class Node:
+    __slots__ = ()
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+class Program(Node):
+    __slots__ = ('body',)
+
+    def __init__(self, body):
+        self.body = body
+
+
+class Const(Node):
+    __slots__ = ('value', 'type')
+
+    def __init__(self, value, type):
+        self.value = value
+        self.type = type
+
+
+class Var(Node):
+    __slots__ = ('name', 'type')
+
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+
+
+class Unary(Node):
+    __slots__ = ('op', 'operand', 'type')
+
+    def __init__(self, op, operand, type):
+        self.op = op
+        self.operand = operand
+        self.type = type
+
+
+class Binary(Node):
+    __slots__ = ('op', 'left', 'right', 'type')
+
+    def __init__(self, op, left, right, type):
+        self.op = op
+        self.left = left
+        self.right = right
+        self.type = type
+
+
+class Assign(Node):
+    # Assignment statements and declarations with an initializer
+    __slots__ = ('name', 'type', 'value', 'line')
+
+    def __init__(self, name, type, value, line):
+        self.name = name
+        self.type = type
+        self.value = value
+        self.line = line
+
+
+class Print(Node):
+    __slots__ = ('values', 'line')
+
+    def __init__(self, values, line):
+        self.values = values
+        self.line = line
+
+
+class Scan(Node):
+    __slots__ = ('targets', 'line')
+
+    def __init__(self, targets, line):
+        self.targets = targets  # [(name, type)]
+        self.line = line
+
+
+class If(Node):
+    __slots__ = ('condition', 'body', 'orelse', 'line')
+
+    def __init__(self, condition, body, orelse, line):
+        self.condition = condition
+        self.body = body
+        self.orelse = orelse  # None without an else branch
+        self.line = line
+
+
+class While(Node):
+    __slots__ = ('condition', 'body', 'line')
+
+    def __init__(self, condition, body, line):
+        self.condition = condition
+        self.body = body
+        self.line = line
+
+
+class For(Node):
+    __slots__ = ('init', 'condition', 'update', 'body', 'line')
+
+    def __init__(self, init, condition, update, body, line):
+        self.init = init
+        self.condition = condition
+        self.update = update
+        self.body = body
+        self.line = line
+
+
+class Switch(Node):
+    __slots__ = ('subject', 'cases', 'default', 'line')
+
+    def __init__(self, subject, cases, default, line):
+        self.subject = subject
+        self.cases = cases  # [(value, body)]
+        self.default = default  # None without a default clause
+        self.line = line
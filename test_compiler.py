@@ -0,0 +1,25 @@
+import contextlib
+import io
+import unittest
+
+from compiler import Compiler, DIAG_TRACE
+
+SOURCE = 'var x int;\nfunc main() {\n    x = 1 + 2;\n    print(x);\n}\n'
+
+
+class CompilerTraceTest(unittest.TestCase):
+    def test_trace_goes_to_log_without_trace_writer(self):
+        for stream_tokens in (True, False):
+            lines = []
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                result = Compiler(stream_tokens=stream_tokens, log=lines.append, level=DIAG_TRACE).compile(SOURCE)
+            self.assertTrue(result.success, result.error)
+            self.assertEqual(stdout.getvalue(), '')
+            self.assertEqual(result.messages, [])
+            self.assertTrue(any(line.startswith('table_of_symbols:') for line in lines))
+            self.assertTrue(any(line.split()[:2] == ['x', 'id'] for line in lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
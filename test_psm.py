@@ -0,0 +1,38 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from compiler import Compiler
+from psm import PostfixStackMachine
+from psm_register import RegisterMachine
+
+OVERFLOWING_FLOAT = '9' * 400 + '.5'
+
+
+def run(machine_class, basename, engine):
+    outputs = []
+    machine = machine_class(output=outputs)
+    with contextlib.redirect_stdout(io.StringIO()):
+        machine.load_postfix_file(basename)
+        machine.execute_postfix(engine=engine)
+    return outputs, machine.error
+
+
+class CompiledEngineTest(unittest.TestCase):
+    def test_overflowing_float_literal(self):
+        source = f'var x float;\nfunc main() {{\n    x = {OVERFLOWING_FLOAT};\n    print(x, -x, {OVERFLOWING_FLOAT});\n}}\n'
+        result = Compiler().compile(source, 'overflow')
+        self.assertTrue(result.success, result.error)
+        with tempfile.TemporaryDirectory() as directory:
+            basename = os.path.join(directory, 'overflow')
+            result.save(basename)
+            for machine_class in (PostfixStackMachine, RegisterMachine):
+                expected = run(machine_class, basename, 'interpreter')
+                self.assertEqual(expected, (['Output: inf', 'Output: -inf', 'Output: inf'], None))
+                self.assertEqual(run(machine_class, basename, 'compiled'), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()